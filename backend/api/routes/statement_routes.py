@@ -158,7 +158,7 @@ async def upload_statement(file: UploadFile = File(...)):
         logger.info("🤖 Running LLM extraction with Gemini...")
         llm_service = get_gemini_llm()
         extractor = BankStatementExtractor(llm_service)
-        extraction_result = extractor.extract(text)
+        extraction_result = await extractor.aextract(text)
         
         # If LLM fails and we have an Excel file, try fallback extraction
         if not extraction_result.get('success') and file_ext == '.xlsx':
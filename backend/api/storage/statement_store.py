@@ -10,6 +10,8 @@ import logging
 import uuid
 from supabase import create_client, Client
 
+from services.storage.supabase_query import invalidate_account
+
 from api.models.statement_model import (
     BankStatement,
     BankStatementData,
@@ -88,6 +90,7 @@ class SupabaseStatementStore:
             raise Exception("Failed to create statement in database")
         
         logger.info(f"Created statement in database: {statement_id}")
+        invalidate_account(data.account_number)
         
         # Return BankStatement model
         return BankStatement(
@@ -205,6 +208,7 @@ class SupabaseStatementStore:
         
         if result.data and len(result.data) > 0:
             logger.info(f"Deleted statement: {statement_id}")
+            invalidate_account(result.data[0].get("account_number"))
             return True
         
         return False
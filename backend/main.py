@@ -3,6 +3,9 @@ Financial Document Intelligence API
 Main FastAPI application with invoice extraction endpoints
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
@@ -23,13 +26,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the tokenizer and Supabase client so the first request doesn't pay for them"""
+    from services.storage.supabase_query import warmup as warmup_supabase
+    from services.token_optimizer import warmup as warmup_tokenizer
+    
+    results = await asyncio.gather(
+        asyncio.to_thread(warmup_tokenizer),
+        asyncio.to_thread(warmup_supabase),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Startup warmup failed: {result}")
+    yield
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Financial Document Intelligence API",
     description="AI-powered invoice extraction and validation system with Azure OCR + Groq LLM",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -5,6 +5,7 @@ Provides common OCR and LLM structuring logic
 
 from abc import ABC, abstractmethod
 from typing import Dict, Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -130,6 +131,17 @@ class BaseExtractor(ABC):
             logger.error(f"[{self.document_type}] LLM structuring error: {e}")
             return None
     
+    async def _astructure_with_llm(self, prompt: str) -> Optional[Dict]:
+        """Structure extracted text without blocking the event loop"""
+        try:
+            if hasattr(self.llm, "astructure_data"):
+                return await self.llm.astructure_data(prompt)
+            # LLM service has no native async path - run it off the loop
+            return await asyncio.to_thread(self.llm.structure_data, prompt)
+        except Exception as e:
+            logger.error(f"[{self.document_type}] LLM structuring error: {e}")
+            return None
+    
     def _validate_extraction(self, data: Dict) -> Dict:
         """
         Validate extracted data against expected fields
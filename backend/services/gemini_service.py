@@ -4,18 +4,47 @@ Uses Google's Gemini API for data extraction
 """
 
 import os
+import re
 import json
 import logging
 import time
-from typing import Dict, Optional
+import asyncio
+import tempfile
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+from aiolimiter import AsyncLimiter
 import google.generativeai as genai
+from google.generativeai import caching
+from google.api_core import exceptions as google_exceptions
+
+from services.json_stream import JSONStreamCollector
+from services.token_optimizer import get_token_optimizer
+
+# New SDK is only needed for the Batch API path
+try:
+    from google import genai as genai_sdk
+    GENAI_BATCH_AVAILABLE = True
+except ImportError:
+    GENAI_BATCH_AVAILABLE = False
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Context caching needs an explicit model version
+CACHE_MODEL = "models/gemini-2.0-flash-001"
+CACHE_TTL_SECONDS = 3600
+CACHE_REFRESH_MARGIN = 300  # recreate the cache this long before it expires
+# Gemini's minimum explicit-cache size for CACHE_MODEL; smaller prefixes are
+# rejected by CachedContent.create, so they aren't cached at all
+CACHE_MIN_TOKENS = 4096
+
+# Leading ```json / ``` and trailing ``` fences around a JSON response
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?|```\s*\Z")
+
 
 class GeminiLLM:
     """LLM service using Google Gemini"""
@@ -36,68 +65,424 @@ class GeminiLLM:
         
         # Use Gemini 2.0 Flash for fast extraction
         self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.generation_config = {
+            'temperature': 0.1,
+            'top_p': 0.95,
+            'top_k': 40,
+        }
         self.max_retries = 3
         self.retry_delay = 15  # seconds
+        self.max_parse_retries = 2  # self-correction rounds for malformed JSON
+        self._batch_client = None  # google-genai client, created on first batch job
+        
+        # Context cache for a static prompt prefix (see register_cached_prefix)
+        self._cache_prefix: Optional[str] = None
+        self._uncacheable_prefix: Optional[str] = None  # last prefix rejected as too small
+        self._cache_ttl = CACHE_TTL_SECONDS
+        self._cache = None
+        self._cached_model = None
+        self._cache_expires_at = 0.0
+        self._cache_retry_at = 0.0
+        self._cache_lock = threading.Lock()
+        
+        # Admission control for the async path: cap in-flight prompts and
+        # requests/tokens per minute so bursts stay under the quota
+        self.max_concurrency = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+        self.requests_per_minute = int(os.getenv("GEMINI_RPM", "15"))
+        self.tokens_per_minute = int(os.getenv("GEMINI_TPM", "1000000"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._request_limiter = AsyncLimiter(self.requests_per_minute, time_period=60)
+        self._token_limiter = AsyncLimiter(self.tokens_per_minute, time_period=60)
         
         logger.info("Gemini LLM service initialized with model: gemini-2.0-flash")
     
+    def register_cached_prefix(self, prefix: str, ttl_seconds: int = CACHE_TTL_SECONDS):
+        """
+        Register a static prompt prefix (instructions + schema) for context caching.
+        Prompts starting with it only send the remainder; the cache itself is
+        created lazily on first use and recreated shortly before its TTL expires.
+        Prefixes below CACHE_MIN_TOKENS can't be cached and are ignored.
+        
+        Args:
+            prefix: Exact leading text shared by every prompt
+            ttl_seconds: Cache lifetime on the Gemini side
+        """
+        with self._cache_lock:
+            if prefix in (self._cache_prefix, self._uncacheable_prefix):
+                return
+            
+            # Local estimate - skips a CachedContent.create that would fail every TTL
+            token_count = get_token_optimizer().count_tokens(prefix)
+            if token_count < CACHE_MIN_TOKENS:
+                logger.info(
+                    f"Prompt prefix (~{token_count} tokens) is below Gemini's "
+                    f"{CACHE_MIN_TOKENS}-token cache minimum, sending full prompts"
+                )
+                self._uncacheable_prefix = prefix
+                self._cache_prefix = None
+                self._cached_model = None
+                return
+            
+            self._cache_prefix = prefix
+            self._cache_ttl = ttl_seconds
+            self._cached_model = None
+            self._cache_expires_at = 0.0
+            self._cache_retry_at = 0.0
+    
+    def _select_model(self, prompt: str) -> Tuple[genai.GenerativeModel, str]:
+        """
+        Pick the model and prompt text to send: the cached-content model plus
+        the prompt remainder when the prefix matches, else the full prompt
+        """
+        prefix = self._cache_prefix
+        if not prefix or not prompt.startswith(prefix):
+            return self.model, prompt
+        
+        cached_model = self._get_cached_model()
+        if cached_model is None:
+            return self.model, prompt
+        return cached_model, prompt[len(prefix):]
+    
+    def _get_cached_model(self) -> Optional[genai.GenerativeModel]:
+        """Model bound to the prefix cache, (re)creating the cache when due"""
+        now = time.monotonic()
+        if self._cached_model is not None and now < self._cache_expires_at - CACHE_REFRESH_MARGIN:
+            return self._cached_model
+        if now < self._cache_retry_at:
+            return None
+        
+        with self._cache_lock:
+            now = time.monotonic()
+            if self._cached_model is not None and now < self._cache_expires_at - CACHE_REFRESH_MARGIN:
+                return self._cached_model
+            
+            previous = self._cache
+            try:
+                self._cache = caching.CachedContent.create(
+                    model=CACHE_MODEL,
+                    display_name="structure-prefix",
+                    system_instruction=self._cache_prefix,
+                    ttl=timedelta(seconds=self._cache_ttl)
+                )
+                self._cached_model = genai.GenerativeModel.from_cached_content(cached_content=self._cache)
+                self._cache_expires_at = now + self._cache_ttl
+                logger.info(f"Created Gemini context cache {self._cache.name} (ttl {self._cache_ttl}s)")
+            except Exception as e:
+                # e.g. prefix below the minimum cacheable size - send full prompts
+                logger.warning(f"Gemini context cache unavailable, sending full prompts: {e}")
+                self._cache = None
+                self._cached_model = None
+                self._cache_retry_at = now + self._cache_ttl
+                return None
+            
+            if previous is not None:
+                try:
+                    previous.delete()
+                except Exception as e:
+                    logger.debug(f"Failed to delete old Gemini context cache: {e}")
+            
+            return self._cached_model
+    
     def structure_data(self, prompt: str) -> Optional[Dict]:
         """
         Structure data using Gemini with custom prompt.
-        Includes retry logic for rate limits.
+        Includes retry logic for rate limits; malformed JSON is fed back
+        to the model for self-correction.
         """
         for attempt in range(1, self.max_retries + 1):
             try:
                 logger.info(f"Sending extraction request to Gemini (attempt {attempt}/{self.max_retries})...")
                 
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config={
-                        'temperature': 0.1,
-                        'top_p': 0.95,
-                        'top_k': 40,
-                    }
-                )
+                extracted_data = self._generate_json(prompt)
                 
-                # Extract response text
-                response_text = response.text.strip()
+                if extracted_data is not None:
+                    logger.info("Successfully structured data with Gemini")
+                return extracted_data
                 
-                # Clean markdown code blocks
-                if response_text.startswith("```json"):
-                    response_text = response_text.replace("```json", "").replace("```", "").strip()
-                elif response_text.startswith("```"):
-                    response_text = response_text.replace("```", "").strip()
+            except Exception as e:
+                wait = self._retry_wait(e, attempt)
+                if wait is not None:
+                    logger.warning(f"Gemini call failed ({type(e).__name__}). Waiting {wait}s before retry...")
+                    time.sleep(wait)
+                    continue
+                logger.error(f"Gemini structuring failed: {e}")
+                return None
+        
+        logger.error("All retries failed")
+        return None
+    
+    async def astructure_data(self, prompt: str) -> Optional[Dict]:
+        """
+        Async variant of structure_data using generate_content_async.
+        Concurrent uploads overlap their Gemini calls instead of blocking the event loop.
+        """
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                logger.info(f"Sending async extraction request to Gemini (attempt {attempt}/{self.max_retries})...")
                 
-                extracted_data = json.loads(response_text)
+                extracted_data = await self._agenerate_json(prompt)
                 
-                logger.info("Successfully structured data with Gemini")
+                if extracted_data is not None:
+                    logger.info("Successfully structured data with Gemini (async)")
                 return extracted_data
                 
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse Gemini response as JSON: {e}")
-                logger.error(f"Response was: {response_text[:500]}")
-                return None
             except Exception as e:
-                error_str = str(e)
-                if "429" in error_str or "rate" in error_str.lower() or "quota" in error_str.lower():
-                    if attempt < self.max_retries:
-                        wait = self.retry_delay * attempt
-                        logger.warning(f"Rate limited. Waiting {wait}s before retry...")
-                        time.sleep(wait)
-                        continue
+                wait = self._retry_wait(e, attempt)
+                if wait is not None:
+                    logger.warning(f"Gemini call failed ({type(e).__name__}). Waiting {wait}s before retry...")
+                    await asyncio.sleep(wait)
+                    continue
                 logger.error(f"Gemini structuring failed: {e}")
                 return None
         
         logger.error("All retries failed")
         return None
+    
+    def _retry_wait(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying, or None if the error is permanent.
+        Quota errors (429 / RESOURCE_EXHAUSTED) honor Retry-After when present;
+        transient server errors back off linearly.
+        """
+        if attempt >= self.max_retries:
+            return None
+        
+        # ResourceExhausted is a subclass of TooManyRequests
+        if isinstance(error, google_exceptions.TooManyRequests):
+            response = getattr(error, "response", None)
+            retry_after = response.headers.get("retry-after") if response is not None else None
+            try:
+                return float(retry_after) if retry_after else self.retry_delay * attempt
+            except ValueError:
+                return self.retry_delay * attempt
+        
+        if isinstance(error, (
+            google_exceptions.ServiceUnavailable,
+            google_exceptions.DeadlineExceeded,
+            google_exceptions.InternalServerError,
+        )):
+            return self.retry_delay * attempt
+        
+        return None
+    
+    def _generate_json(self, prompt: str) -> Optional[Dict]:
+        """
+        Generate and parse a JSON response, asking Gemini to correct
+        malformed output up to max_parse_retries times.
+        API errors propagate to the caller's retry loop.
+        """
+        model, prompt = self._select_model(prompt)
+        contents = [{"role": "user", "parts": [prompt]}]
+        
+        for parse_attempt in range(self.max_parse_retries + 1):
+            response = model.generate_content(
+                contents,
+                generation_config=self.generation_config,
+                stream=True
+            )
+            
+            # Stop reading as soon as the top-level JSON object closes
+            collector = JSONStreamCollector()
+            for chunk in response:
+                if collector.feed(chunk.text):
+                    break
+            response_text = collector.text
+            
+            try:
+                return self._parse_json_response(response_text)
+            except json.JSONDecodeError as e:
+                if parse_attempt == self.max_parse_retries:
+                    logger.error(f"Failed to parse Gemini response as JSON: {e}")
+                    logger.error(f"Response was: {response_text[:500]}")
+                    return None
+                logger.warning(
+                    f"Gemini returned invalid JSON ({e}), asking for a correction "
+                    f"(retry {parse_attempt + 1}/{self.max_parse_retries})"
+                )
+                contents.extend(self._feedback_contents(response_text, e))
+                time.sleep(1.0 * (parse_attempt + 1))
+        
+        return None
+    
+    async def _agenerate_json(self, prompt: str) -> Optional[Dict]:
+        """Async variant of _generate_json behind the admission-control gates"""
+        # Cache creation is a blocking REST call
+        model, prompt = await asyncio.to_thread(self._select_model, prompt)
+        contents = [{"role": "user", "parts": [prompt]}]
+        
+        for parse_attempt in range(self.max_parse_retries + 1):
+            # Rough token estimate (~4 chars/token), capped to the bucket size
+            prompt_chars = sum(len(part) for c in contents for part in c["parts"])
+            estimated_tokens = min(prompt_chars // 4 + 1, self.tokens_per_minute)
+            
+            async with self._semaphore:
+                await self._request_limiter.acquire()
+                await self._token_limiter.acquire(estimated_tokens)
+                response = await model.generate_content_async(
+                    contents,
+                    generation_config=self.generation_config,
+                    stream=True
+                )
+                
+                collector = JSONStreamCollector()
+                async for chunk in response:
+                    if collector.feed(chunk.text):
+                        break
+            response_text = collector.text
+            
+            try:
+                return self._parse_json_response(response_text)
+            except json.JSONDecodeError as e:
+                if parse_attempt == self.max_parse_retries:
+                    logger.error(f"Failed to parse Gemini response as JSON: {e}")
+                    logger.error(f"Response was: {response_text[:500]}")
+                    return None
+                logger.warning(
+                    f"Gemini returned invalid JSON ({e}), asking for a correction "
+                    f"(retry {parse_attempt + 1}/{self.max_parse_retries})"
+                )
+                contents.extend(self._feedback_contents(response_text, e))
+                await asyncio.sleep(1.0 * (parse_attempt + 1))
+        
+        return None
+    
+    @staticmethod
+    def _feedback_contents(response_text: str, error: Exception) -> List[Dict]:
+        """Conversation turns asking Gemini to fix its malformed JSON"""
+        return [
+            {"role": "model", "parts": [response_text]},
+            {"role": "user", "parts": [f"Your output had error: {error}. Return only valid JSON matching the schema."]}
+        ]
+    
+    def structure_data_batch(
+        self,
+        prompts: List[str],
+        poll_interval: float = 30.0,
+        max_poll_interval: float = 600.0
+    ) -> List[Optional[Dict]]:
+        """
+        Structure many prompts through the Gemini Batch API.
+        For non-interactive bulk work (re-processing, nightly ingestion) - jobs
+        complete within 24h at half the real-time price and bypass per-request
+        rate limits. Falls back to sequential real-time calls if google-genai
+        is not installed.
+        
+        Args:
+            prompts: Extraction prompts
+            poll_interval: Initial seconds between job status checks
+            max_poll_interval: Upper bound for the exponential poll backoff
+            
+        Returns:
+            List of extracted dicts (None for failed items), same order as prompts
+        """
+        if not prompts:
+            return []
+        
+        if not GENAI_BATCH_AVAILABLE:
+            logger.warning("google-genai not installed, running batch as real-time calls")
+            return [self.structure_data(prompt) for prompt in prompts]
+        
+        results: List[Optional[Dict]] = [None] * len(prompts)
+        request_path = None
+        
+        try:
+            if self._batch_client is None:
+                self._batch_client = genai_sdk.Client(api_key=self.api_key)
+            client = self._batch_client
+            
+            # Step 1: Write one request per line, keyed by prompt index
+            with tempfile.NamedTemporaryFile(
+                mode='w', suffix='.jsonl', delete=False, encoding='utf-8'
+            ) as f:
+                request_path = f.name
+                for idx, prompt in enumerate(prompts):
+                    f.write(json.dumps({
+                        "key": str(idx),
+                        "request": {
+                            "contents": [{"parts": [{"text": prompt}]}],
+                            "generation_config": self.generation_config
+                        }
+                    }) + "\n")
+            
+            # Step 2: Upload request file and submit the job
+            uploaded = client.files.upload(
+                file=request_path,
+                config={"display_name": "structure-batch", "mime_type": "jsonl"}
+            )
+            batch_job = client.batches.create(
+                model="gemini-2.0-flash",
+                src=uploaded.name,
+                config={"display_name": "structure-batch"}
+            )
+            logger.info(f"Submitted Gemini batch job {batch_job.name} ({len(prompts)} prompts)")
+            
+            # Step 3: Poll with exponential backoff
+            done_states = {
+                "JOB_STATE_SUCCEEDED",
+                "JOB_STATE_FAILED",
+                "JOB_STATE_CANCELLED",
+                "JOB_STATE_EXPIRED"
+            }
+            wait = poll_interval
+            while batch_job.state.name not in done_states:
+                time.sleep(wait)
+                wait = min(wait * 2, max_poll_interval)
+                batch_job = client.batches.get(name=batch_job.name)
+            
+            if batch_job.state.name != "JOB_STATE_SUCCEEDED":
+                logger.error(f"Gemini batch job {batch_job.name} ended in {batch_job.state.name}")
+                return results
+            
+            # Step 4: Download results and scatter them back by key
+            content = client.files.download(file=batch_job.dest.file_name)
+            for line in content.decode('utf-8').splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                idx = int(item.get("key", -1))
+                if not 0 <= idx < len(prompts):
+                    continue
+                
+                if "error" in item:
+                    logger.error(f"Batch item {idx} failed: {item['error']}")
+                    continue
+                
+                try:
+                    parts = item["response"]["candidates"][0]["content"]["parts"]
+                    response_text = "".join(part.get("text", "") for part in parts).strip()
+                    results[idx] = self._parse_json_response(response_text)
+                except (KeyError, IndexError, json.JSONDecodeError) as e:
+                    logger.error(f"Failed to parse batch item {idx}: {e}")
+            
+            succeeded = sum(1 for r in results if r is not None)
+            logger.info(f"Gemini batch job complete: {succeeded}/{len(prompts)} structured")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Gemini batch structuring failed: {e}")
+            return results
+        finally:
+            if request_path and os.path.exists(request_path):
+                try:
+                    os.unlink(request_path)
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _parse_json_response(response_text: str) -> Dict:
+        """Strip markdown code fences and parse the Gemini response as JSON"""
+        return json.loads(_FENCE_RE.sub("", response_text))
 
 
 # Singleton instance
 _gemini_llm = None
+_gemini_llm_lock = threading.Lock()
 
 def get_gemini_llm() -> GeminiLLM:
     """Get or create Gemini LLM instance"""
     global _gemini_llm
     if _gemini_llm is None:
-        _gemini_llm = GeminiLLM()
+        with _gemini_llm_lock:
+            if _gemini_llm is None:
+                _gemini_llm = GeminiLLM()
     return _gemini_llm
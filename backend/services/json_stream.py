@@ -0,0 +1,72 @@
+"""
+Incremental JSON collector for streamed LLM responses
+Detects when the top-level JSON value closes so callers can stop reading
+the stream (and start parsing) without waiting for the full completion
+"""
+
+
+class JSONStreamCollector:
+    """
+    Accumulates streamed text chunks and tracks JSON nesting depth.
+    Braces inside string literals are ignored; anything before the first
+    '{' or '[' (e.g. a markdown fence) is kept but not counted.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._length = 0
+        self._end = None
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self) -> bool:
+        """True once the top-level JSON object/array has closed"""
+        return self._end is not None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Add a streamed chunk
+
+        Args:
+            chunk: Next piece of response text
+
+        Returns:
+            True if the top-level JSON value is now complete
+        """
+        if self._end is not None or not chunk:
+            return self.complete
+
+        self._parts.append(chunk)
+
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = self._started
+            elif ch == '{' or ch == '[':
+                self._depth += 1
+                self._started = True
+            elif (ch == '}' or ch == ']') and self._started:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = self._length + i + 1
+                    break
+
+        self._length += len(chunk)
+        return self.complete
+
+    @property
+    def text(self) -> str:
+        """Collected text, cut right after the closing brace when complete"""
+        text = "".join(self._parts)
+        if self._end is not None:
+            text = text[:self._end]
+        return text.strip()
@@ -4,17 +4,105 @@ Uses Groq's Llama 3.1 to structure OCR text into JSON
 """
 
 import os
+import re
 import json
+import time
+import asyncio
 import logging
-from typing import Dict, Optional
-from groq import Groq
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+import httpx
+from aiolimiter import AsyncLimiter
+from groq import (
+    Groq,
+    AsyncGroq,
+    DefaultAioHttpClient,
+    RateLimitError,
+    APIConnectionError,
+    APIStatusError,
+)
 from dotenv import load_dotenv
 
+from services.json_stream import JSONStreamCollector
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Groq model speed tiers - simple extractions go to the small model first
+SPEED_MAP = {
+    "instant": "llama-3.1-8b-instant",
+    "balanced": "llama-3.3-70b-versatile",
+    "fast70b": "llama-3.3-70b-specdec",
+}
+
+SYSTEM_PROMPT = "You are an expert at extracting structured data from financial documents. Always return valid JSON."
+
+# Invoice extraction prompt - static schema/instructions first, OCR text last
+INVOICE_PROMPT_PREFIX = """
+Extract the following information from the invoice text below and return it as JSON.
+
+Extract these fields (use null if not found):
+- invoice_number: The invoice/document number
+- date: Invoice date in YYYY-MM-DD format
+- due_date: Payment due date in YYYY-MM-DD format (if present)
+- vendor_name: Name of the vendor/seller
+- vendor_address: Vendor's address (if present)
+- customer_name: Name of the customer/buyer (if present)
+- total_amount: Total amount as a number (no currency symbols)
+- currency: Currency code (USD, EUR, etc.)
+- line_items: Array of items with description, quantity, unit_price, total
+- tax_amount: Tax amount if specified
+- subtotal: Subtotal before tax (if present)
+
+Use this format:
+{
+  "invoice_number": "...",
+  "date": "YYYY-MM-DD",
+  "due_date": "YYYY-MM-DD",
+  "vendor_name": "...",
+  "vendor_address": "...",
+  "customer_name": "...",
+  "total_amount": 0.00,
+  "currency": "USD",
+  "line_items": [
+    {
+      "description": "...",
+      "quantity": 0,
+      "unit_price": 0.00,
+      "total": 0.00
+    }
+  ],
+  "tax_amount": 0.00,
+  "subtotal": 0.00
+}
+
+Invoice Text:
+"""
+
+INVOICE_PROMPT_SUFFIX = """
+
+Return ONLY valid JSON, no additional text.
+"""
+
+# Groq reset headers look like "7.66s", "2m59.56s" or "120ms"
+_RESET_RE = re.compile(r"(?:(\d+)h)?(?:(\d+)m(?!s))?(?:([\d.]+)s)?(?:([\d.]+)ms)?")
+
+# Output budget for structure_data: sized from the prompt, escalated to the
+# ceiling only when a response is cut off
+MAX_OUTPUT_TOKENS = 8000
+OUTPUT_TOKEN_RATIO = 1.2  # output tokens per prompt token for JSON extraction
+OUTPUT_TOKEN_MARGIN = 256
+
+# Small prompts are packed into one call while their predicted output fits the ceiling
+BATCH_PROMPT_TOKEN_LIMIT = int((MAX_OUTPUT_TOKENS - OUTPUT_TOKEN_MARGIN) / OUTPUT_TOKEN_RATIO)
+
+# Leading ```json / ``` and trailing ``` fences around a JSON response
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?|```\s*\Z")
+
 
 class LLMService:
     """Handles intelligent extraction using LLM"""
@@ -30,13 +118,51 @@ class LLMService:
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables")
         
-        self.client = Groq(api_key=self.api_key)
-        self.model = "llama-3.3-70b-versatile"  # Updated to current active model
+        # Shared keep-alive pool: reuses TLS sessions and multiplexes over HTTP/2
+        self._http = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=64,
+                max_keepalive_connections=32,
+                keepalive_expiry=300
+            ),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+        # Retries are handled by _with_retries so typed errors decide what is retryable
+        self.client = Groq(api_key=self.api_key, http_client=self._http, max_retries=0)
+        self.max_retries = 3
+        self.retry_delay = 2.0  # seconds, scaled by attempt for transient errors
+        self._async_client = None  # Created lazily on first async call
+        
+        # Admission control: cap in-flight prompts and requests/tokens per minute
+        # so we stay under the Groq quota instead of retrying 429s
+        self.max_concurrency = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+        self.requests_per_minute = int(os.getenv("GROQ_RPM", "30"))
+        self.tokens_per_minute = int(os.getenv("GROQ_TPM", "6000"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._request_limiter = AsyncLimiter(self.requests_per_minute, time_period=60)
+        self._token_limiter = AsyncLimiter(self.tokens_per_minute, time_period=60)
+        self._resume_at = 0.0  # monotonic time when the server-side quota resets
+        self.max_parse_retries = 2  # self-correction rounds for malformed JSON
+        self.model = SPEED_MAP["balanced"]  # Updated to current active model
         logger.info(f"LLM service initialized with model: {self.model}")
     
+    @property
+    def async_client(self) -> AsyncGroq:
+        """Async Groq client on the aiohttp backend (created on first use)"""
+        if self._async_client is None:
+            self._async_client = AsyncGroq(
+                api_key=self.api_key,
+                http_client=DefaultAioHttpClient(),
+                max_retries=0
+            )
+        return self._async_client
+    
     def extract_invoice_data(self, ocr_text: str) -> Dict:
         """
         Extract structured invoice data from OCR text
+        Served by the instant tier; escalates to the balanced tier when the
+        small model's output is not valid invoice JSON
         
         Args:
             ocr_text: Raw text from OCR
@@ -44,46 +170,52 @@ class LLMService:
         Returns:
             Dict with extracted invoice data
         """
+        response_text = ""
         try:
             prompt = self._build_extraction_prompt(ocr_text)
             
-            logger.info("Sending extraction request to LLM...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at extracting structured data from financial documents. Always return valid JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,  # Low temperature for consistent extraction
-                max_tokens=1024
-            )
-            
-            # Extract response
-            response_text = response.choices[0].message.content.strip()
-            
-            # Try to parse JSON
-            # Sometimes LLM wraps JSON in markdown code blocks
-            if response_text.startswith("```json"):
-                response_text = response_text.replace("```json", "").replace("```", "").strip()
-            elif response_text.startswith("```"):
-                response_text = response_text.replace("```", "").strip()
-            
-            extracted_data = json.loads(response_text)
-            
-            logger.info("Successfully extracted invoice data")
-            return {
-                "success": True,
-                "data": extracted_data,
-                "model": self.model
-            }
+            for tier in ("instant", "balanced"):
+                model = SPEED_MAP[tier]
+                
+                logger.info(f"Sending extraction request to LLM (tier={tier}, model={model})...")
+                response = self._with_retries(lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": SYSTEM_PROMPT
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    temperature=0.1,  # Low temperature for consistent extraction
+                    max_tokens=1024
+                ))
+                
+                # Extract response
+                response_text = response.choices[0].message.content.strip()
+                
+                try:
+                    extracted_data = self._parse_json_response(response_text)
+                    if not isinstance(extracted_data, dict):
+                        raise ValueError("Expected a JSON object")
+                except ValueError as e:  # json.JSONDecodeError is a ValueError
+                    if tier == "balanced":
+                        raise
+                    logger.warning(f"Tier '{tier}' returned invalid invoice JSON ({e}), escalating")
+                    continue
+                
+                logger.info(f"Successfully extracted invoice data (served by tier={tier}, model={model})")
+                return {
+                    "success": True,
+                    "data": extracted_data,
+                    "model": model,
+                    "tier": tier
+                }
             
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             logger.error(f"Failed to parse LLM response as JSON: {e}")
             logger.error(f"Response was: {response_text}")
             return {
@@ -101,7 +233,8 @@ class LLMService:
     def structure_data(self, prompt: str) -> Optional[Dict]:
         """
         Generic method to structure data using LLM with custom prompt
-        Used by document extractors
+        Used by document extractors. Invalid JSON is fed back to the model
+        for self-correction (up to max_parse_retries) instead of failing outright.
         
         Args:
             prompt: Custom extraction prompt
@@ -109,98 +242,412 @@ class LLMService:
         Returns:
             Dict with extracted data or None if failed
         """
+        messages = [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        response_text = ""
+        
         try:
-            logger.info("Sending custom extraction request to LLM...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at extracting structured data from financial documents. Always return valid JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,  # Low temperature for consistent extraction
-                max_tokens=8000  # Increased for large bank statements
-            )
+            for attempt in range(self.max_parse_retries + 1):
+                logger.info("Sending custom extraction request to LLM...")
+                response_text = self._with_retries(lambda: self._complete(messages))
+                
+                try:
+                    extracted_data = self._parse_json_response(response_text)
+                except json.JSONDecodeError as e:
+                    if attempt == self.max_parse_retries:
+                        raise
+                    logger.warning(
+                        f"LLM returned invalid JSON ({e}), asking for a correction "
+                        f"(retry {attempt + 1}/{self.max_parse_retries})"
+                    )
+                    messages.extend(self._feedback_messages(response_text, e))
+                    time.sleep(1.0 * (attempt + 1))
+                    continue
+                
+                logger.info("Successfully structured data with custom prompt")
+                return extracted_data
             
-            # Extract response
-            response_text = response.choices[0].message.content.strip()
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse LLM response as JSON: {e}")
+            logger.error(f"Response was: {response_text[:500]}")
+            return None
+        except Exception as e:
+            logger.error(f"LLM structuring failed: {e}")
+            return None
+    
+    def structure_data_batch(self, prompts: List[str]) -> List[Optional[Dict]]:
+        """
+        Structure many small documents with as few LLM calls as possible.
+        Prompts are grouped while their combined size fits one response budget;
+        each group is sent as a numbered list and answered with a JSON array.
+        Oversized prompts and groups whose answer doesn't line up fall back
+        to individual structure_data calls.
+        
+        Args:
+            prompts: Extraction prompts (one per document)
             
-            # Try to parse JSON
-            # Sometimes LLM wraps JSON in markdown code blocks
-            if response_text.startswith("```json"):
-                response_text = response_text.replace("```json", "").replace("```", "").strip()
-            elif response_text.startswith("```"):
-                response_text = response_text.replace("```", "").strip()
+        Returns:
+            List of extracted dicts (None for failed items), same order as prompts
+        """
+        results: List[Optional[Dict]] = [None] * len(prompts)
+        
+        for group in self._batch_groups(prompts):
+            if len(group) == 1:
+                results[group[0]] = self.structure_data(prompts[group[0]])
+                continue
             
-            extracted_data = json.loads(response_text)
+            extracted = self._structure_group([prompts[idx] for idx in group])
+            if extracted is None:
+                logger.warning(f"Batched extraction of {len(group)} documents failed, falling back to single calls")
+                extracted = [self.structure_data(prompts[idx]) for idx in group]
             
-            logger.info("Successfully structured data with custom prompt")
-            return extracted_data
+            for idx, data in zip(group, extracted):
+                results[idx] = data
+        
+        return results
+    
+    @staticmethod
+    def _batch_groups(prompts: List[str]) -> List[List[int]]:
+        """Split prompt indices into groups that fit BATCH_PROMPT_TOKEN_LIMIT"""
+        groups: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        
+        for idx, prompt in enumerate(prompts):
+            tokens = len(prompt) // 4 + 1
+            if current and current_tokens + tokens > BATCH_PROMPT_TOKEN_LIMIT:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(idx)
+            current_tokens += tokens
+        
+        if current:
+            groups.append(current)
+        return groups
+    
+    def _structure_group(self, prompts: List[str]) -> Optional[List[Optional[Dict]]]:
+        """
+        One LLM call for several documents
+        
+        Returns:
+            Extracted dicts in prompt order, or None if the response can't be mapped back
+        """
+        documents = "\n\n".join(
+            f"Document {i}:\n{prompt}" for i, prompt in enumerate(prompts, start=1)
+        )
+        messages = [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"For each document below (numbered 1..{len(prompts)}), follow its instructions "
+                    f"and return a JSON array with exactly {len(prompts)} extraction objects, "
+                    f"in document order.\n\n{documents}"
+                )
+            }
+        ]
+        
+        try:
+            logger.info(f"Sending batched extraction request for {len(prompts)} documents...")
+            response_text = self._with_retries(lambda: self._complete(messages))
+            extracted = self._parse_json_response(response_text)
+        except Exception as e:
+            logger.error(f"Batched LLM structuring failed: {e}")
+            return None
+        
+        if not isinstance(extracted, list) or len(extracted) != len(prompts):
+            logger.warning(f"Batched response had {len(extracted) if isinstance(extracted, list) else 'no'} items, expected {len(prompts)}")
+            return None
+        
+        return [item if isinstance(item, dict) else None for item in extracted]
+    
+    async def astructure_data(self, prompt: str) -> Optional[Dict]:
+        """
+        Async variant of structure_data
+        Lets concurrent uploads overlap their Groq round-trips instead of
+        blocking the event loop / worker thread for the whole call
+        
+        Args:
+            prompt: Custom extraction prompt
+            
+        Returns:
+            Dict with extracted data or None if failed
+        """
+        messages = [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        response_text = ""
+        
+        try:
+            for attempt in range(self.max_parse_retries + 1):
+                logger.info("Sending async extraction request to LLM...")
+                response_text = await self._awith_retries(lambda: self._acomplete(messages))
+                
+                try:
+                    extracted_data = self._parse_json_response(response_text)
+                except json.JSONDecodeError as e:
+                    if attempt == self.max_parse_retries:
+                        raise
+                    logger.warning(
+                        f"LLM returned invalid JSON ({e}), asking for a correction "
+                        f"(retry {attempt + 1}/{self.max_parse_retries})"
+                    )
+                    messages.extend(self._feedback_messages(response_text, e))
+                    await asyncio.sleep(1.0 * (attempt + 1))
+                    continue
+                
+                logger.info("Successfully structured data with custom prompt (async)")
+                return extracted_data
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse LLM response as JSON: {e}")
             logger.error(f"Response was: {response_text[:500]}")
             return None
         except Exception as e:
-            logger.error(f"LLM structuring failed: {e}")
+            logger.error(f"Async LLM structuring failed: {e}")
+            return None
+    
+    def _complete(self, messages: List[Dict]) -> str:
+        """Run one chat completion and return the stripped response text"""
+        max_tokens = self._estimate_max_tokens(messages)
+        
+        while True:
+            # Quota exhausted according to the last response - wait for the reset
+            wait = self._resume_at - time.monotonic()
+            if wait > 0:
+                logger.info(f"Groq quota exhausted, waiting {wait:.1f}s for reset")
+                time.sleep(wait)
+            
+            raw_response = self.client.chat.completions.with_raw_response.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.1,  # Low temperature for consistent extraction
+                max_tokens=max_tokens,
+                stream=True
+            )
+            self._update_rate_limits(raw_response.headers)
+            stream = raw_response.parse()
+            
+            # Stop reading as soon as the top-level JSON object closes
+            collector = JSONStreamCollector()
+            finish_reason = None
+            try:
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    finish_reason = choice.finish_reason or finish_reason
+                    if collector.feed(choice.delta.content or ""):
+                        break
+            finally:
+                stream.close()
+            
+            if not self._should_escalate(finish_reason, max_tokens, collector):
+                return collector.text
+            max_tokens = MAX_OUTPUT_TOKENS
+    
+    async def _acomplete(self, messages: List[Dict]) -> str:
+        """Async chat completion behind the admission-control gates"""
+        # Rough token estimate (~4 chars/token), capped to the bucket size
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        estimated_tokens = min(prompt_chars // 4 + 1, self.tokens_per_minute)
+        max_tokens = self._estimate_max_tokens(messages)
+        
+        while True:
+            async with self._semaphore:
+                await self._request_limiter.acquire()
+                await self._token_limiter.acquire(estimated_tokens)
+                
+                wait = self._resume_at - time.monotonic()
+                if wait > 0:
+                    logger.info(f"Groq quota exhausted, waiting {wait:.1f}s for reset")
+                    await asyncio.sleep(wait)
+                
+                raw_response = await self.async_client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.1,
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+                self._update_rate_limits(raw_response.headers)
+                stream = await raw_response.parse()
+                
+                collector = JSONStreamCollector()
+                finish_reason = None
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        choice = chunk.choices[0]
+                        finish_reason = choice.finish_reason or finish_reason
+                        if collector.feed(choice.delta.content or ""):
+                            break
+                finally:
+                    await stream.close()
+            
+            if not self._should_escalate(finish_reason, max_tokens, collector):
+                return collector.text
+            max_tokens = MAX_OUTPUT_TOKENS
+    
+    @staticmethod
+    def _estimate_max_tokens(messages: List[Dict]) -> int:
+        """
+        Output budget predicted from the extraction prompt size (~4 chars/token).
+        A tight cap finishes sooner and reserves less server-side KV cache.
+        """
+        # messages[1] is the original user prompt; later turns are JSON-correction feedback
+        prompt_tokens = len(messages[1]["content"]) // 4
+        return min(MAX_OUTPUT_TOKENS, int(prompt_tokens * OUTPUT_TOKEN_RATIO) + OUTPUT_TOKEN_MARGIN)
+    
+    @staticmethod
+    def _should_escalate(finish_reason: Optional[str], max_tokens: int, collector: JSONStreamCollector) -> bool:
+        """True if the response was cut off by a predicted budget below the ceiling"""
+        if collector.complete:
+            logger.debug(f"Response used ~{len(collector.text) // 4}/{max_tokens} output tokens")
+        if finish_reason != "length" or max_tokens >= MAX_OUTPUT_TOKENS:
+            return False
+        logger.info(f"Response truncated at max_tokens={max_tokens}, retrying with {MAX_OUTPUT_TOKENS}")
+        return True
+    
+    def _with_retries(self, call: Callable[[], T]) -> T:
+        """
+        Run a Groq call, retrying only errors that can succeed on retry:
+        rate limits (honoring Retry-After), timeouts/connection drops and 5xx.
+        Anything else (bad request, auth, ...) is raised immediately.
+        """
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                return call()
+            except Exception as e:
+                wait = self._retry_wait(e, attempt)
+                if wait is None:
+                    raise
+                logger.warning(f"Groq call failed ({type(e).__name__}), retrying in {wait:.1f}s...")
+                time.sleep(wait)
+    
+    async def _awith_retries(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Async variant of _with_retries"""
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                return await call()
+            except Exception as e:
+                wait = self._retry_wait(e, attempt)
+                if wait is None:
+                    raise
+                logger.warning(f"Groq call failed ({type(e).__name__}), retrying in {wait:.1f}s...")
+                await asyncio.sleep(wait)
+    
+    def _retry_wait(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error should be raised"""
+        if attempt >= self.max_retries:
             return None
+        
+        if isinstance(error, RateLimitError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                return float(retry_after) if retry_after else self.retry_delay * attempt
+            except ValueError:
+                return self.retry_delay * attempt
+        
+        # APITimeoutError is a subclass of APIConnectionError
+        if isinstance(error, APIConnectionError):
+            return self.retry_delay * attempt
+        
+        if isinstance(error, APIStatusError) and error.status_code >= 500:
+            return self.retry_delay * attempt
+        
+        return None
+    
+    @staticmethod
+    def _feedback_messages(response_text: str, error: Exception) -> List[Dict]:
+        """Conversation turns asking the model to fix its malformed JSON"""
+        return [
+            {
+                "role": "assistant",
+                "content": response_text
+            },
+            {
+                "role": "user",
+                "content": f"Your output had error: {error}. Return only valid JSON matching the schema."
+            }
+        ]
+    
+    def _update_rate_limits(self, headers) -> None:
+        """
+        Track Groq's x-ratelimit-* headers and hold back admission
+        until the reset when the remaining request/token budget hits zero
+        """
+        for kind in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            reset = headers.get(f"x-ratelimit-reset-{kind}")
+            if remaining is None or reset is None:
+                continue
+            try:
+                if int(float(remaining)) > 0:
+                    continue
+            except ValueError:
+                continue
+            
+            resume_at = time.monotonic() + self._parse_reset(reset)
+            if resume_at > self._resume_at:
+                self._resume_at = resume_at
+                logger.warning(f"Groq {kind} quota exhausted, pausing admission for {reset}")
+    
+    @staticmethod
+    def _parse_reset(value: str) -> float:
+        """Convert a Groq reset duration ('2m59.56s', '120ms') to seconds"""
+        match = _RESET_RE.fullmatch(value.strip())
+        if not match:
+            return 1.0
+        hours, minutes, seconds, millis = match.groups()
+        return (
+            int(hours or 0) * 3600
+            + int(minutes or 0) * 60
+            + float(seconds or 0)
+            + float(millis or 0) / 1000
+        )
+    
+    @staticmethod
+    def _parse_json_response(response_text: str) -> Dict:
+        """Strip markdown code fences and parse the LLM response as JSON"""
+        return json.loads(_FENCE_RE.sub("", response_text))
     
     def _build_extraction_prompt(self, ocr_text: str) -> str:
-        """Build prompt for invoice data extraction"""
-        return f"""
-Extract the following information from this invoice text and return it as JSON:
-
-Invoice Text:
-{ocr_text}
-
-Extract these fields (use null if not found):
-- invoice_number: The invoice/document number
-- date: Invoice date in YYYY-MM-DD format
-- due_date: Payment due date in YYYY-MM-DD format (if present)
-- vendor_name: Name of the vendor/seller
-- vendor_address: Vendor's address (if present)
-- customer_name: Name of the customer/buyer (if present)
-- total_amount: Total amount as a number (no currency symbols)
-- currency: Currency code (USD, EUR, etc.)
-- line_items: Array of items with description, quantity, unit_price, total
-- tax_amount: Tax amount if specified
-- subtotal: Subtotal before tax (if present)
-
-Return ONLY valid JSON, no additional text. Use this format:
-{{
-  "invoice_number": "...",
-  "date": "YYYY-MM-DD",
-  "due_date": "YYYY-MM-DD",
-  "vendor_name": "...",
-  "vendor_address": "...",
-  "customer_name": "...",
-  "total_amount": 0.00,
-  "currency": "USD",
-  "line_items": [
-    {{
-      "description": "...",
-      "quantity": 0,
-      "unit_price": 0.00,
-      "total": 0.00
-    }}
-  ],
-  "tax_amount": 0.00,
-  "subtotal": 0.00
-}}
-"""
+        """
+        Build prompt for invoice data extraction
+        The fixed schema comes first so providers can cache the constant prefix
+        """
+        return INVOICE_PROMPT_PREFIX + ocr_text + INVOICE_PROMPT_SUFFIX
 
 
 # Singleton instance
 _llm_service = None
+_llm_service_lock = threading.Lock()
 
 def get_llm_service() -> LLMService:
     """Get or create LLM service instance"""
     global _llm_service
     if _llm_service is None:
-        _llm_service = LLMService()
+        with _llm_service_lock:
+            if _llm_service is None:
+                _llm_service = LLMService()
     return _llm_service
@@ -0,0 +1,124 @@
+"""
+OCR Result Cache
+Content-addressed disk cache for OCR results, keyed by file SHA-256 + model
+Skips repeated (slow, paid-per-page) OCR calls on duplicate uploads and retries
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Keys every cached OCR result must carry - entries missing them are evicted
+REQUIRED_KEYS = ("success", "text", "confidence", "engine")
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class OCRResultCache:
+    """Disk-backed cache of OCR result dicts"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Initialize OCR cache
+
+        Args:
+            cache_dir: Directory for cached JSON results (defaults to OCR_CACHE_DIR env)
+        """
+        self.cache_dir = Path(cache_dir or os.getenv("OCR_CACHE_DIR", ".ocr_cache"))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        """
+        SHA-256 of the file contents, prefixed with the 8-byte file length
+        so different-length inputs can't collide on a shared prefix
+        """
+        digest = hashlib.sha256()
+        digest.update(os.path.getsize(file_path).to_bytes(8, "big"))
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def make_key(self, file_path: str, model_id: str) -> str:
+        """Cache key for a file analysed with a given OCR model"""
+        return f"{self.file_digest(file_path)}_{model_id}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Load a cached result, revalidating its shape
+
+        Returns:
+            Cached result dict or None on miss / invalid entry
+        """
+        path = self.cache_dir / f"{key}.json"
+        if not path.exists():
+            return None
+
+        try:
+            result = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Evicting unreadable OCR cache entry {key}: {e}")
+            self._evict(path)
+            return None
+
+        if not isinstance(result, dict) or not result.get("success") or not all(k in result for k in REQUIRED_KEYS):
+            logger.warning(f"Evicting invalid OCR cache entry {key}")
+            self._evict(path)
+            return None
+
+        logger.info(f"OCR cache hit: {key[:16]}...")
+        return result
+
+    def set(self, key: str, result: Dict):
+        """Store a successful OCR result (written atomically)"""
+        if not result.get("success"):
+            return
+
+        try:
+            payload = json.dumps(result)
+        except TypeError as e:
+            # Result holds SDK objects that don't round-trip through JSON
+            logger.debug(f"OCR result not cacheable: {e}")
+            return
+
+        # Unique temp file per writer, so concurrent OCRs of the same file
+        # can't interleave their writes before the rename
+        path = self.cache_dir / f"{key}.json"
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.cache_dir, prefix=f"{key}.", suffix=".tmp", delete=False
+            ) as tmp:
+                tmp_path = Path(tmp.name)
+                tmp.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write OCR cache entry: {e}")
+            if tmp_path is not None:
+                self._evict(tmp_path)
+
+    @staticmethod
+    def _evict(path: Path):
+        """Remove a cache file, ignoring errors"""
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+# Singleton instance
+_ocr_cache = None
+
+def get_ocr_cache() -> OCRResultCache:
+    """Get or create OCR cache instance"""
+    global _ocr_cache
+    if _ocr_cache is None:
+        _ocr_cache = OCRResultCache()
+    return _ocr_cache
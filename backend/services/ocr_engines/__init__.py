@@ -0,0 +1,4 @@
+"""
+OCR Engines Package
+Accelerated inference backends that plug into EasyOCR's reader
+"""
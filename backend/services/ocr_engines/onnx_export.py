@@ -0,0 +1,111 @@
+"""
+ONNX export of EasyOCR's models
+Shared by the accelerated backends - each one starts from the same
+CRAFT detector / CRNN recognizer graphs with dynamic input shapes
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 17
+
+
+def engine_cache_dir(backend: str) -> Path:
+    """Artifact directory for a backend: <OCR_ENGINE_CACHE_DIR or cache>/<backend>"""
+    path = Path(os.getenv("OCR_ENGINE_CACHE_DIR", "cache")) / backend
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _unwrap(module: torch.nn.Module) -> torch.nn.Module:
+    """Strip EasyOCR's DataParallel wrapper for export"""
+    return module.module if isinstance(module, torch.nn.DataParallel) else module
+
+
+class _ImageOnly(torch.nn.Module):
+    """Export shim - the CTC recognizer ignores its text argument"""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, image):
+        return self.model(image, None)
+
+
+def _export_onnx(
+    module: torch.nn.Module,
+    args: Tuple,
+    onnx_path: Path,
+    input_names: List[str],
+    output_names: List[str],
+    dynamic_axes: Dict[str, Dict[int, str]]
+):
+    """Export a torch module to ONNX (skipped if the file already exists)"""
+    if onnx_path.exists():
+        return
+    logger.info(f"Exporting {onnx_path.name} to ONNX...")
+
+    tmp_path = onnx_path.with_suffix(".tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            module.eval(),
+            args,
+            str(tmp_path),
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET
+        )
+    os.replace(tmp_path, onnx_path)
+
+
+def export_detector(reader, onnx_path: Path):
+    """
+    Export the CRAFT detector: normalized BGR canvas -> (score maps, features)
+
+    Args:
+        reader: easyocr.Reader
+        onnx_path: Destination .onnx file
+    """
+    _export_onnx(
+        _unwrap(reader.detector),
+        (torch.randn(1, 3, 640, 640, device=reader.device),),
+        onnx_path,
+        input_names=["image"],
+        output_names=["y", "feature"],
+        dynamic_axes={
+            "image": {2: "height", 3: "width"},
+            "y": {1: "out_height", 2: "out_width"},
+            "feature": {2: "out_height", 3: "out_width"}
+        }
+    )
+
+
+def export_recognizer(reader, onnx_path: Path):
+    """
+    Export the CRNN recognizer: grayscale 64px-high crops -> per-step class scores.
+    The reader must be built with quantize=False - dynamically quantized
+    torch modules don't export.
+
+    Args:
+        reader: easyocr.Reader
+        onnx_path: Destination .onnx file
+    """
+    _export_onnx(
+        _ImageOnly(_unwrap(reader.recognizer)),
+        (torch.randn(1, 1, 64, 256, device=reader.device),),
+        onnx_path,
+        input_names=["image"],
+        output_names=["preds"],
+        dynamic_axes={
+            "image": {0: "batch", 3: "width"},
+            "preds": {0: "batch", 1: "steps"}
+        }
+    )
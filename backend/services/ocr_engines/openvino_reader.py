@@ -0,0 +1,100 @@
+"""
+OpenVINO backend for EasyOCR
+Converts the CRAFT detector and CRNN recognizer to FP16-compressed IR and
+compiles them on the AUTO device, so Intel CPUs (VNNI/AMX) and iGPUs run
+readtext() without an NVIDIA card
+"""
+
+import logging
+import threading
+
+import torch
+
+from services.ocr_engines.onnx_export import engine_cache_dir, export_detector, export_recognizer
+
+try:
+    import openvino as ov
+    OPENVINO_AVAILABLE = True
+except ImportError:
+    OPENVINO_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# AUTO picks GPU.0 when an Intel GPU is present, else CPU
+OPENVINO_DEVICE = "AUTO"
+
+
+class OVModule:
+    """
+    Callable stand-in for a torch module backed by an OpenVINO compiled model.
+    Takes and returns CPU torch tensors so EasyOCR's surrounding code is unchanged.
+    """
+
+    def __init__(self, compiled_model):
+        self.compiled_model = compiled_model
+        self.num_inputs = len(compiled_model.inputs)
+        self._local = threading.local()  # infer requests aren't thread-safe
+
+    def eval(self):
+        """No-op, EasyOCR calls model.eval() before inference"""
+        return self
+
+    def __call__(self, *inputs: torch.Tensor):
+        """Run inference; extra positional inputs pruned from the graph are ignored"""
+        request = getattr(self._local, "request", None)
+        if request is None:
+            request = self._local.request = self.compiled_model.create_infer_request()
+
+        arrays = [t.detach().cpu().numpy() for t in inputs[:self.num_inputs]]
+        request.infer(arrays)
+
+        outputs = [
+            torch.from_numpy(request.get_output_tensor(i).data.copy())
+            for i in range(len(self.compiled_model.outputs))
+        ]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+
+def _compile(core, onnx_path, xml_path):
+    """Convert ONNX to FP16-compressed IR once, then compile it"""
+    if not xml_path.exists():
+        logger.info(f"Converting {onnx_path.name} to OpenVINO IR...")
+        ov.save_model(ov.convert_model(str(onnx_path)), str(xml_path), compress_to_fp16=True)
+    return core.compile_model(str(xml_path), device_name=OPENVINO_DEVICE)
+
+
+class OpenVINOReader:
+    """
+    EasyOCR reader whose detector and recognizer run on OpenVINO.
+    Exposes the wrapped reader's API (readtext, readtext_batched, ...).
+    """
+
+    def __init__(self, reader):
+        """
+        Args:
+            reader: easyocr.Reader on CPU, built with quantize=False
+        """
+        if not OPENVINO_AVAILABLE:
+            raise ImportError("openvino is required for the OpenVINO OCR engine")
+
+        self.reader = reader
+        cache_dir = engine_cache_dir("openvino")
+
+        core = ov.Core()
+        # Reuse compiled device blobs across restarts
+        core.set_property({"CACHE_DIR": str(cache_dir / "compiled")})
+
+        det_onnx = cache_dir / "craft.onnx"
+        export_detector(reader, det_onnx)
+        detector = _compile(core, det_onnx, cache_dir / "craft.xml")
+
+        rec_onnx = cache_dir / f"crnn_{reader.model_lang}.onnx"
+        export_recognizer(reader, rec_onnx)
+        recognizer = _compile(core, rec_onnx, cache_dir / f"crnn_{reader.model_lang}.xml")
+
+        reader.detector = OVModule(detector)
+        reader.recognizer = OVModule(recognizer)
+        logger.info(f"OpenVINO OCR models compiled on {OPENVINO_DEVICE}")
+
+    def __getattr__(self, name):
+        return getattr(self.reader, name)
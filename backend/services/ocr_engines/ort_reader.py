@@ -0,0 +1,87 @@
+"""
+ONNX Runtime INT8 backend for EasyOCR
+Dynamically quantizes the CRNN recognizer's weights to INT8 (VNNI/AVX-512
+dot products on modern x86, ~4x smaller model) and runs both models
+through ONNX Runtime's CPU provider with full graph optimization
+"""
+
+import logging
+
+import torch
+
+from services.ocr_engines.onnx_export import engine_cache_dir, export_detector, export_recognizer
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ORTModule:
+    """
+    Callable stand-in for a torch module backed by an ONNX Runtime session.
+    Takes and returns CPU torch tensors so EasyOCR's surrounding code is unchanged.
+    """
+
+    def __init__(self, model_path):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def eval(self):
+        """No-op, EasyOCR calls model.eval() before inference"""
+        return self
+
+    def __call__(self, *inputs: torch.Tensor):
+        """Run inference; extra positional inputs pruned from the graph are ignored"""
+        feeds = {
+            name: tensor.detach().cpu().numpy()
+            for name, tensor in zip(self.input_names, inputs)
+        }
+        outputs = [torch.from_numpy(out) for out in self.session.run(None, feeds)]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+
+class ORTInt8Reader:
+    """
+    EasyOCR reader running the detector in ONNX Runtime (FP32) and the
+    recognizer as a dynamically quantized INT8 model.
+    Exposes the wrapped reader's API (readtext, readtext_batched, ...).
+    """
+
+    def __init__(self, reader):
+        """
+        Args:
+            reader: easyocr.Reader on CPU, built with quantize=False
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime is required for the INT8 OCR engine")
+
+        self.reader = reader
+        cache_dir = engine_cache_dir("ort")
+
+        det_onnx = cache_dir / "craft.onnx"
+        export_detector(reader, det_onnx)
+
+        rec_onnx = cache_dir / f"crnn_{reader.model_lang}.onnx"
+        rec_int8 = cache_dir / f"crnn_{reader.model_lang}_int8.onnx"
+        export_recognizer(reader, rec_onnx)
+        if not rec_int8.exists():
+            logger.info(f"Quantizing {rec_onnx.name} to INT8...")
+            quantize_dynamic(str(rec_onnx), str(rec_int8), weight_type=QuantType.QInt8)
+
+        reader.detector = ORTModule(det_onnx)
+        reader.recognizer = ORTModule(rec_int8)
+        logger.info("ONNX Runtime OCR models loaded (INT8 recognizer)")
+
+    def __getattr__(self, name):
+        return getattr(self.reader, name)
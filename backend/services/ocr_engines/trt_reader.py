@@ -0,0 +1,168 @@
+"""
+TensorRT backend for EasyOCR
+Exports the CRAFT detector and CRNN recognizer to ONNX once, builds FP16
+TensorRT engines cached per GPU architecture, and swaps them into an
+EasyOCR reader so readtext() runs on Tensor Cores unchanged
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Tuple
+
+import torch
+
+from services.ocr_engines.onnx_export import engine_cache_dir, export_detector, export_recognizer
+
+try:
+    import tensorrt as trt
+    TENSORRT_AVAILABLE = True
+except ImportError:
+    TENSORRT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (min, opt, max) shapes for the dynamic-shape optimization profiles.
+# Detector canvases are capped by EasyOCR's canvas_size (2560); recognizer
+# crops are resized to imgH=64 with variable width and batch
+DETECTOR_PROFILE = ((1, 3, 64, 64), (1, 3, 1280, 1280), (1, 3, 2560, 2560))
+RECOGNIZER_PROFILE = ((1, 1, 64, 32), (8, 1, 64, 512), (32, 1, 64, 2048))
+
+
+def _engine_tag() -> str:
+    """Cache key for engines - serialized engines only load on the same GPU arch and TRT version"""
+    major, minor = torch.cuda.get_device_capability()
+    return f"sm{major}{minor}_trt{trt.__version__}_fp16"
+
+
+class TRTModule:
+    """
+    Callable stand-in for a torch module backed by a TensorRT engine.
+    Takes and returns CUDA tensors, so EasyOCR's pre/post-processing
+    runs unchanged around it.
+    """
+
+    def __init__(self, engine_path: Path):
+        self._logger = trt.Logger(trt.Logger.WARNING)
+        runtime = trt.Runtime(self._logger)
+        self.engine = runtime.deserialize_cuda_engine(engine_path.read_bytes())
+        if self.engine is None:
+            raise RuntimeError(f"Failed to deserialize TensorRT engine {engine_path}")
+        self.context = self.engine.create_execution_context()
+
+        names = [self.engine.get_tensor_name(i) for i in range(self.engine.num_io_tensors)]
+        self.input_names = [n for n in names if self.engine.get_tensor_mode(n) == trt.TensorIOMode.INPUT]
+        self.output_names = [n for n in names if self.engine.get_tensor_mode(n) == trt.TensorIOMode.OUTPUT]
+        self._dtypes = {n: self._torch_dtype(self.engine.get_tensor_dtype(n)) for n in names}
+
+    @staticmethod
+    def _torch_dtype(dtype) -> torch.dtype:
+        return {
+            trt.DataType.FLOAT: torch.float32,
+            trt.DataType.HALF: torch.float16,
+            trt.DataType.INT32: torch.int32,
+            trt.DataType.INT8: torch.int8,
+            trt.DataType.BOOL: torch.bool,
+        }[dtype]
+
+    def eval(self):
+        """No-op, EasyOCR calls model.eval() before inference"""
+        return self
+
+    def __call__(self, *inputs: torch.Tensor):
+        """
+        Run the engine. Extra positional inputs that were pruned from the
+        ONNX graph (e.g. the recognizer's unused text tensor) are ignored.
+        """
+        bound = []
+        for name, tensor in zip(self.input_names, inputs):
+            tensor = tensor.to(device="cuda", dtype=self._dtypes[name]).contiguous()
+            bound.append(tensor)  # keep alive until the stream finishes
+            self.context.set_input_shape(name, tuple(tensor.shape))
+            self.context.set_tensor_address(name, tensor.data_ptr())
+
+        outputs = []
+        for name in self.output_names:
+            shape = tuple(self.context.get_tensor_shape(name))
+            out = torch.empty(shape, dtype=self._dtypes[name], device="cuda")
+            self.context.set_tensor_address(name, out.data_ptr())
+            outputs.append(out)
+
+        stream = torch.cuda.current_stream()
+        if not self.context.execute_async_v3(stream.cuda_stream):
+            raise RuntimeError("TensorRT inference failed")
+        stream.synchronize()
+
+        outputs = [out.float() if out.dtype == torch.float16 else out for out in outputs]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+
+def _build_engine(onnx_path: Path, engine_path: Path, input_name: str, profile_shapes: Tuple):
+    """Build and serialize an FP16 engine with one dynamic-shape profile"""
+    if engine_path.exists():
+        return
+    logger.info(f"Building TensorRT engine {engine_path.name} (one-time, may take minutes)...")
+
+    trt_logger = trt.Logger(trt.Logger.WARNING)
+    builder = trt.Builder(trt_logger)
+    network = builder.create_network(1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH))
+    parser = trt.OnnxParser(network, trt_logger)
+    if not parser.parse(onnx_path.read_bytes()):
+        errors = "; ".join(str(parser.get_error(i)) for i in range(parser.num_errors))
+        raise RuntimeError(f"Failed to parse {onnx_path.name}: {errors}")
+
+    config = builder.create_builder_config()
+    if builder.platform_has_fast_fp16:
+        config.set_flag(trt.BuilderFlag.FP16)
+
+    profile = builder.create_optimization_profile()
+    profile.set_shape(input_name, *profile_shapes)
+    config.add_optimization_profile(profile)
+
+    serialized = builder.build_serialized_network(network, config)
+    if serialized is None:
+        raise RuntimeError(f"TensorRT engine build failed for {onnx_path.name}")
+
+    tmp_path = engine_path.with_suffix(".tmp")
+    tmp_path.write_bytes(bytes(serialized))
+    os.replace(tmp_path, engine_path)
+
+
+class TRTReader:
+    """
+    EasyOCR reader whose detector and recognizer run as TensorRT engines.
+    Exposes the wrapped reader's API (readtext, readtext_batched, ...).
+    """
+
+    def __init__(self, reader):
+        """
+        Args:
+            reader: easyocr.Reader initialized on a CUDA device
+        """
+        if not TENSORRT_AVAILABLE:
+            raise ImportError("tensorrt is required for the TensorRT OCR engine")
+        if not torch.cuda.is_available():
+            raise RuntimeError("TensorRT OCR engine needs a CUDA device")
+
+        self.reader = reader
+        cache_dir = engine_cache_dir("trt")
+        tag = _engine_tag()
+
+        # Detector: CRAFT takes a normalized BGR canvas, returns (score maps, features)
+        det_onnx = cache_dir / "craft.onnx"
+        det_engine = cache_dir / f"craft_{tag}.engine"
+        export_detector(reader, det_onnx)
+        _build_engine(det_onnx, det_engine, "image", DETECTOR_PROFILE)
+
+        # Recognizer: CRNN takes grayscale crops (text input is unused by CTC)
+        rec_onnx = cache_dir / f"crnn_{reader.model_lang}.onnx"
+        rec_engine = cache_dir / f"crnn_{reader.model_lang}_{tag}.engine"
+        export_recognizer(reader, rec_onnx)
+        _build_engine(rec_onnx, rec_engine, "image", RECOGNIZER_PROFILE)
+
+        reader.detector = TRTModule(det_engine)
+        reader.recognizer = TRTModule(rec_engine)
+        logger.info(f"TensorRT OCR engines loaded ({tag})")
+
+    def __getattr__(self, name):
+        return getattr(self.reader, name)
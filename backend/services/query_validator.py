@@ -6,12 +6,28 @@ Prevents injection attacks and enforces business rules
 
 import re
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from api.error_codes import ErrorCode, ErrorMessage
 
+# RE2 matches in linear time (no backtracking), so crafted queries can't
+# trigger ReDoS in the injection checks; fall back to re if not installed
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+def _compile_alternation(patterns: List[str]):
+    """Compile patterns into one case-insensitive alternation (RE2 when available)"""
+    combined = "(?i)" + "|".join(patterns)
+    if RE2_AVAILABLE:
+        return re2.compile(combined)
+    return re.compile(combined)
+
+
 class QueryValidator:
     """
     Validates and sanitizes user queries
@@ -45,16 +61,28 @@ class QueryValidator:
     # Allowed special characters for natural language queries
     ALLOWED_SPECIAL_CHARS = set("?,.'!₹$€£¥-/()[]{}@#%&*+=:;\"")
     
+    # translate() table deleting every character that never counts as an invalid
+    # special (ASCII alnum/whitespace and the allowed set) - counting then runs
+    # in C and only leftover characters reach the Python-level checks
+    _UNCOUNTED_CHARS_TABLE = {
+        **{i: None for i in range(128) if chr(i).isalnum() or chr(i).isspace()},
+        **{ord(c): None for c in ALLOWED_SPECIAL_CHARS}
+    }
+    
+    # sanitize(): HTML tags are dropped, then runs of 3+ identical specials
+    # are cut to two - in that order, so a run split by a tag still collapses
+    _HTML_RE = re.compile(r'<[^>]+>')
+    _RUN_RE = re.compile(r'([^\w\s₹$€£¥])\1{2,}')
+    _NULL_TABLE = {0: None}
+    
+    # Compiled once at class load, shared by all instances
+    SQL_PATTERN = _compile_alternation(SQL_INJECTION_PATTERNS)
+    XSS_PATTERN = _compile_alternation(XSS_PATTERNS)
+    
     def __init__(self):
         """Initialize query validator"""
-        self.sql_pattern = re.compile(
-            '|'.join(self.SQL_INJECTION_PATTERNS),
-            re.IGNORECASE
-        )
-        self.xss_pattern = re.compile(
-            '|'.join(self.XSS_PATTERNS),
-            re.IGNORECASE
-        )
+        self.sql_pattern = self.SQL_PATTERN
+        self.xss_pattern = self.XSS_PATTERN
     
     def validate(self, query: str) -> Tuple[bool, Optional[ErrorCode], Optional[str]]:
         """
@@ -90,7 +118,8 @@ class QueryValidator:
             return False, ErrorCode.QUERY_INJECTION_DETECTED, "Potential XSS detected"
         
         # Check for excessive special characters
-        special_char_count = sum(1 for c in query if not c.isalnum() and not c.isspace() and c not in self.ALLOWED_SPECIAL_CHARS)
+        leftover = query.translate(self._UNCOUNTED_CHARS_TABLE)
+        special_char_count = sum(1 for c in leftover if not c.isalnum() and not c.isspace())
         if special_char_count > 10:
             return False, ErrorCode.QUERY_INVALID_CHARACTERS, "Too many invalid special characters"
         
@@ -113,16 +142,16 @@ class QueryValidator:
         query = query.strip()
         
         # Remove null bytes
-        query = query.replace('\x00', '')
+        query = query.translate(self._NULL_TABLE)
         
         # Normalize whitespace
         query = ' '.join(query.split())
         
         # Remove any HTML tags
-        query = re.sub(r'<[^>]+>', '', query)
+        query = self._HTML_RE.sub('', query)
         
         # Limit consecutive special characters
-        query = re.sub(r'([^\w\s₹$€£¥])\1{2,}', r'\1\1', query)
+        query = self._RUN_RE.sub(r'\1\1', query)
         
         return query
     
@@ -3,15 +3,145 @@ Bank Statement Storage and Query Service
 Loads and searches extracted bank statement JSON files
 """
 
+import copy
 import json
 import logging
+import os
+import re
+import threading
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-import re
+
+import numpy as np
+import pandas as pd
+
+# orjson parses several times faster than the stdlib; optional
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional: Hyperscan scans the whole description haystack in one native pass
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Optional: watch the data directory for new/changed result files
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Worker threads for loading result files - the reads overlap on I/O
+LOAD_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+# Memoized summary/analytics results kept per store generation
+MAX_CACHED_RESULTS = 256
+
+# Merchant name between slashes in UPI narrations (".../MERCHANT/Payment...")
+MERCHANT_PATTERN = r'/([^/]+)/(?:Paymen|collec)'
+
+# Payment method tokens whose row sets are precomputed at load
+PAYMENT_METHODS = ("UPI", "NEFT", "IMPS", "RTGS", "ATM", "POS", "NACH", "ECS", "CHQ")
+
+# Below this many rows the per-term Hyperscan compile costs more than str.find
+HYPERSCAN_MIN_ROWS = 5000
+
+# Quiet period after the last file event before reloading
+RELOAD_DEBOUNCE_SECONDS = 1.0
+
+
+def synchronized(method):
+    """Run a StatementStore method under the store's lock"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class SubstringIndex:
+    """
+    Substring search over a fixed list of texts.
+    All texts are joined into one NUL-separated haystack so a query is a few
+    C-level str.find calls (one per matching row) instead of a Python-level
+    `in` per row; hit offsets map back to rows via binary search.
+    """
+    
+    SEPARATOR = "\x00"
+    MAX_MEMO = 256
+    
+    def __init__(self, texts: List[str]):
+        self._haystack = self.SEPARATOR.join(t.replace(self.SEPARATOR, " ") for t in texts)
+        lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=len(texts))
+        # Start offset of every row, plus a sentinel past the end
+        self._starts = np.concatenate(([0], np.cumsum(lengths)))
+        self._size = len(texts)
+        self._memo: Dict[str, np.ndarray] = {}
+        self._haystack_bytes: Optional[bytes] = None  # UTF-8 haystack for Hyperscan
+        self._byte_starts: Optional[np.ndarray] = None
+    
+    def rows(self, term: str) -> np.ndarray:
+        """Sorted indices of texts containing term"""
+        cached = self._memo.get(term)
+        if cached is not None:
+            return cached
+        
+        if not term:
+            hits = np.arange(self._size)
+        elif self.SEPARATOR in term:
+            hits = np.empty(0, dtype=np.int64)
+        elif HYPERSCAN_AVAILABLE and self._size >= HYPERSCAN_MIN_ROWS:
+            hits = self._scan_rows(term)
+        else:
+            found = []
+            haystack, starts = self._haystack, self._starts
+            pos = haystack.find(term)
+            while pos != -1:
+                row = int(np.searchsorted(starts, pos, side='right')) - 1
+                found.append(row)
+                # Skip to the next row - one hit per row is enough
+                pos = haystack.find(term, int(starts[row + 1]))
+            hits = np.asarray(found, dtype=np.int64)
+        
+        if len(self._memo) >= self.MAX_MEMO:
+            self._memo.clear()
+        self._memo[term] = hits
+        return hits
+    
+    def _scan_rows(self, term: str) -> np.ndarray:
+        """Rows containing term from a single Hyperscan pass over the haystack"""
+        if self._haystack_bytes is None:
+            self._haystack_bytes = self._haystack.encode("utf-8")
+            rows = self._haystack.split(self.SEPARATOR)
+            lengths = np.fromiter((len(t.encode("utf-8")) + 1 for t in rows), dtype=np.int64, count=len(rows))
+            self._byte_starts = np.concatenate(([0], np.cumsum(lengths)))
+        
+        database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        database.compile(expressions=[re.escape(term).encode("utf-8")], flags=[0])
+        
+        ends = []
+        
+        def on_match(pattern_id, start, end, flags, context):
+            ends.append(end)
+        
+        database.scan(self._haystack_bytes, match_event_handler=on_match)
+        if not ends:
+            return np.empty(0, dtype=np.int64)
+        # Match end offsets -> rows; a match can't span the NUL separator
+        rows = np.searchsorted(self._byte_starts, np.asarray(ends, dtype=np.int64) - 1, side='right') - 1
+        return np.unique(rows)
+
 
 class StatementStore:
     """
@@ -29,9 +159,29 @@ class StatementStore:
         self.data_dir = Path(data_dir)
         self.statements: List[Dict] = []
         self.all_transactions: List[Dict] = []
+        # Column-wise copy of all_transactions (row i <-> all_transactions[i])
+        self._frame = pd.DataFrame()
+        self._description_index = SubstringIndex([])  # lowercase descriptions
+        self._method_index = SubstringIndex([])  # uppercase descriptions
+        # Bumped whenever the data is (re)indexed; keys the result memo
+        self._generation = 0
+        # Row ids sorted by date (valid dates only) for O(log N) range filters
+        self._account_rows: Dict[str, np.ndarray] = {}
+        self._date_order = np.empty(0, dtype=np.int64)
+        self._dates_sorted = np.empty(0, dtype='datetime64[D]')
+        self._totals: Dict = {}
+        self._result_cache: Dict[Tuple, Dict] = {}
+        # Per result file: ((mtime_ns, size), statement or None, transactions)
+        self._files: Dict[Path, Tuple[Tuple[int, int], Optional[Dict], List[Dict]]] = {}
+        # Serializes queries against incremental reloads
+        self._lock = threading.RLock()
+        self._observer = None
+        self._reload_timer: Optional[threading.Timer] = None
+        self._reload_timer_lock = threading.Lock()
         
         # Load all statements
         self._load_all_statements()
+        self._build_columns()
         
         logger.info(f"Statement store initialized: {len(self.statements)} accounts, {len(self.all_transactions)} transactions")
     
@@ -41,34 +191,236 @@ class StatementStore:
             logger.warning(f"Data directory not found: {self.data_dir}")
             return
         
-        # Find all result JSON files (exclude summary)
-        json_files = [f for f in self.data_dir.glob("*_result.json") if "summary" not in f.name]
+        self._refresh_files()
+        logger.info(f"Loaded {len(self.statements)} statements with {len(self.all_transactions)} total transactions")
+    
+    def _result_files(self) -> List[Path]:
+        """Result JSON files in the data directory (exclude summary)"""
+        if not self.data_dir.exists():
+            return []
+        return [f for f in self.data_dir.glob("*_result.json") if "summary" not in f.name]
+    
+    @staticmethod
+    def _file_stamp(json_file: Path) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of a file, None if it vanished"""
+        try:
+            stat = json_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _refresh_files(self) -> bool:
+        """
+        Re-parse result files that are new or whose (mtime, size) changed,
+        drop removed ones, and rebuild the statement/transaction lists.
         
-        for json_file in json_files:
+        Returns:
+            True if anything changed
+        """
+        json_files = self._result_files()
+        stamps = {f: self._file_stamp(f) for f in json_files}
+        changed = [f for f in json_files if f not in self._files or self._files[f][0] != stamps[f]]
+        removed = [f for f in self._files if f not in stamps]
+        if not changed and not removed:
+            return False
+        
+        for json_file in removed:
+            del self._files[json_file]
+        
+        # Read and parse files concurrently
+        with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+            loaded = list(executor.map(self._read_result_file, changed))
+        
+        for json_file, result, error in loaded:
+            if error is not None:
+                logger.error(f"Failed to load {json_file.name}: {error}")
+                self._files.pop(json_file, None)
+                continue
+            
             try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    result = json.load(f)
-                
-                # Only load successful extractions
-                if result.get('success'):
-                    statement_data = result.get('data', {})
-                    
-                    # Add source info
-                    statement_data['source_file'] = result.get('file')
-                    statement_data['account_name'] = self._extract_account_name(result.get('file'))
-                    
-                    self.statements.append(statement_data)
-                    
-                    # Add all transactions with account reference
-                    for txn in statement_data.get('transactions', []):
-                        txn['account'] = statement_data['account_name']
-                        txn['source_file'] = statement_data['source_file']
-                        self.all_transactions.append(txn)
-                
+                self._files[json_file] = (stamps[json_file],) + self._parse_result(result)
             except Exception as e:
                 logger.error(f"Failed to load {json_file.name}: {e}")
+                self._files.pop(json_file, None)
         
-        logger.info(f"Loaded {len(self.statements)} statements with {len(self.all_transactions)} total transactions")
+        # Merge per-file entries in glob order
+        self.statements = []
+        self.all_transactions = []
+        for json_file in json_files:
+            entry = self._files.get(json_file)
+            if entry is None or entry[1] is None:
+                continue
+            self.statements.append(entry[1])
+            self.all_transactions.extend(entry[2])
+        return True
+    
+    def _parse_result(self, result: Dict) -> Tuple[Optional[Dict], List[Dict]]:
+        """Statement and account-tagged transactions of one result file"""
+        # Only load successful extractions
+        if not result.get('success'):
+            return None, []
+        
+        statement_data = result.get('data', {})
+        
+        # Add source info
+        statement_data['source_file'] = result.get('file')
+        statement_data['account_name'] = self._extract_account_name(result.get('file'))
+        
+        # Add all transactions with account reference
+        transactions = statement_data.get('transactions', [])
+        for txn in transactions:
+            txn['account'] = statement_data['account_name']
+            txn['source_file'] = statement_data['source_file']
+        return statement_data, transactions
+    
+    @synchronized
+    def reload_incremental(self) -> bool:
+        """
+        Reload only result files added, modified (mtime/size) or removed
+        since the last load, then re-index the columns.
+        
+        Returns:
+            True if the data changed
+        """
+        if not self._refresh_files():
+            return False
+        self._build_columns()
+        logger.info(f"Statement store reloaded: {len(self.statements)} accounts, {len(self.all_transactions)} transactions")
+        return True
+    
+    def start_watching(self) -> bool:
+        """
+        Watch the data directory and reload_incremental() when result files
+        change. Needs the optional watchdog package.
+        
+        Returns:
+            True if the observer was started
+        """
+        if not WATCHDOG_AVAILABLE or self._observer is not None or not self.data_dir.exists():
+            return False
+        
+        store = self
+        
+        class _ResultFileHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = (getattr(event, 'src_path', ''), getattr(event, 'dest_path', ''))
+                if any(str(p).endswith("_result.json") for p in paths):
+                    store._schedule_reload()
+        
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._observer.schedule(_ResultFileHandler(), str(self.data_dir), recursive=False)
+        self._observer.start()
+        logger.info(f"Watching {self.data_dir} for statement changes")
+        return True
+    
+    def _schedule_reload(self):
+        """Debounce bursts of file events (a write fires several) into one reload"""
+        with self._reload_timer_lock:
+            if self._reload_timer is not None:
+                self._reload_timer.cancel()
+            self._reload_timer = threading.Timer(RELOAD_DEBOUNCE_SECONDS, self._reload_quietly)
+            self._reload_timer.daemon = True
+            self._reload_timer.start()
+    
+    def _reload_quietly(self):
+        try:
+            self.reload_incremental()
+        except Exception as e:
+            logger.error(f"Incremental statement reload failed: {e}")
+    
+    @staticmethod
+    def _read_result_file(json_file: Path) -> Tuple[Path, Optional[Dict], Optional[Exception]]:
+        """Read and parse one result file, returning the error instead of raising"""
+        try:
+            data = json_file.read_bytes()
+            result = orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+            return json_file, result, None
+        except Exception as e:
+            return json_file, None, e
+    
+    def _build_columns(self):
+        """
+        Index all_transactions into SoA columns so filters run as
+        vectorized masks instead of per-row dict lookups
+        """
+        txns = self.all_transactions
+        
+        def text_column(key: str) -> List[str]:
+            return [str(t.get(key) or '') for t in txns]
+        
+        def amount_column(key: str) -> np.ndarray:
+            values = pd.to_numeric(pd.Series([t.get(key, 0) for t in txns], dtype=object), errors='coerce')
+            return values.fillna(0.0).to_numpy(dtype=np.float64)
+        
+        self._frame = pd.DataFrame({
+            "account": text_column('account'),
+            "date": text_column('date'),
+            "transaction_type": text_column('transaction_type'),
+            "description": text_column('description'),
+            "debit": amount_column('debit'),
+            "credit": amount_column('credit'),
+        })
+        
+        # Case-normalized once here so filters compare without per-query .lower()
+        self._frame['account_lc'] = self._frame['account'].str.lower()
+        self._frame['type_lc'] = self._frame['transaction_type'].str.lower()
+        self._account_rows = {
+            account: np.asarray(rows, dtype=np.int64)
+            for account, rows in self._frame.groupby('account_lc', sort=False).indices.items()
+        }
+        
+        # Dates as epoch days; unparseable dates become NaT and never match a range
+        dates = pd.to_datetime(self._frame['date'], format='ISO8601', errors='coerce')
+        dates = dates.to_numpy().astype('datetime64[D]')
+        valid = np.flatnonzero(~np.isnat(dates))
+        order = valid[np.argsort(dates[valid], kind='stable')]
+        self._date_order = order
+        self._dates_sorted = dates[order]
+        
+        descriptions = self._frame['description'].tolist()
+        self._description_index = SubstringIndex([d.lower() for d in descriptions])
+        self._method_index = SubstringIndex([d.upper() for d in descriptions])
+        for method in PAYMENT_METHODS:
+            self._method_index.rows(method)
+        
+        # Unfiltered aggregates, served without touching the rows again
+        debit = self._frame['debit'].to_numpy()
+        credit = self._frame['credit'].to_numpy()
+        self._totals = {
+            "count": len(self._frame),
+            "debits": float(debit.sum()),
+            "credits": float(credit.sum()),
+            "debit_count": int(np.count_nonzero(debit > 0)),
+            "credit_count": int(np.count_nonzero(credit > 0)),
+        }
+        
+        self._generation += 1
+        self._result_cache.clear()
+    
+    def _memoized(self, key: Tuple, compute) -> Dict:
+        """
+        Return a cached result for key (scoped to the current generation),
+        computing it on a miss. Callers get a copy so the cache can't be mutated.
+        """
+        try:
+            key = (self._generation,) + key
+            cached = self._result_cache.get(key)
+        except TypeError:
+            # Unhashable filter value - don't cache
+            return compute()
+        
+        if cached is None:
+            cached = compute()
+            if len(self._result_cache) >= MAX_CACHED_RESULTS:
+                self._result_cache.clear()
+            self._result_cache[key] = cached
+        return copy.deepcopy(cached)
+    
+    @staticmethod
+    def _filters_key(filters: Optional[Dict]) -> Tuple:
+        """Canonical, order-independent key for a filters dict"""
+        return tuple(sorted(filters.items())) if filters else ()
     
     def _extract_account_name(self, filename: str) -> str:
         """Extract account name from filename (e.g., 'Account 1.xlsx' -> 'Account 1')"""
@@ -79,6 +431,7 @@ class StatementStore:
         name = Path(filename).stem
         return name
     
+    @synchronized
     def search_transactions(self, filters: Dict) -> List[Dict]:
         """
         Search transactions with filters.
@@ -97,51 +450,96 @@ class StatementStore:
         Returns:
             List of matching transactions
         """
-        results = self.all_transactions.copy()
+        rows = self._filter_rows(filters)
+        if rows is None:
+            return list(self.all_transactions)
         
-        # Apply account filter
-        if filters.get('account'):
-            account = filters['account']
-            results = [t for t in results if t.get('account', '').lower() == account.lower()]
+        # Materialize matching rows once
+        return [self.all_transactions[i] for i in rows]
+    
+    def _filter_rows(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """
+        Sorted row ids matching search_transactions filters, or None when no
+        filter applies. Index-backed filters run first; column predicates are
+        then evaluated only on the surviving candidates, so cost tracks the
+        match count instead of N x filters.
+        """
+        if not filters:
+            return None
         
-        # Apply date range filter
-        if filters.get('date_from'):
-            date_from = filters['date_from']
-            results = [t for t in results if t.get('date', '') >= date_from]
+        frame = self._frame
+        rows: Optional[np.ndarray] = None
         
-        if filters.get('date_to'):
-            date_to = filters['date_to']
-            results = [t for t in results if t.get('date', '') <= date_to]
+        def narrow(matches: np.ndarray) -> np.ndarray:
+            return matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
         
-        # Apply transaction type filter
-        if filters.get('transaction_type'):
-            txn_type = filters['transaction_type'].lower()
-            if txn_type in ['credit', 'debit']:
-                results = [t for t in results if t.get('transaction_type', '').lower() == txn_type]
+        # Apply account filter
+        if filters.get('account'):
+            account = filters['account'].lower()
+            rows = narrow(self._account_rows.get(account, np.empty(0, dtype=np.int64)))
+        
+        # Apply payment method filter (UPI, NEFT, ATM, etc.)
+        if filters.get('payment_method'):
+            method = filters['payment_method'].upper()
+            rows = narrow(self._method_index.rows(method))
         
         # Apply description search
         if filters.get('description_contains'):
             search_term = filters['description_contains'].lower()
-            results = [t for t in results if search_term in t.get('description', '').lower()]
+            rows = narrow(self._description_index.rows(search_term))
         
-        # Apply amount range filters
-        if filters.get('min_amount') is not None:
-            min_amt = float(filters['min_amount'])
-            results = [t for t in results 
-                      if (t.get('debit', 0) >= min_amt or t.get('credit', 0) >= min_amt)]
+        # Apply date range filter
+        if filters.get('date_from') or filters.get('date_to'):
+            rows = narrow(self._date_range_rows(filters.get('date_from'), filters.get('date_to')))
         
-        if filters.get('max_amount') is not None:
-            max_amt = float(filters['max_amount'])
-            results = [t for t in results 
-                      if (t.get('debit', 0) <= max_amt or t.get('credit', 0) <= max_amt)]
+        # Column predicates below only look at the current candidates
+        txn_type = (filters.get('transaction_type') or '').lower()
+        min_amount = filters.get('min_amount')
+        max_amount = filters.get('max_amount')
+        if txn_type not in ('credit', 'debit') and min_amount is None and max_amount is None:
+            return rows
         
-        # Apply payment method filter (UPI, NEFT, ATM, etc.)
-        if filters.get('payment_method'):
-            method = filters['payment_method'].upper()
-            results = [t for t in results if method in t.get('description', '').upper()]
+        if rows is None:
+            rows = np.arange(len(frame))
+        
+        # Apply transaction type filter
+        if txn_type in ('credit', 'debit'):
+            rows = rows[frame['type_lc'].to_numpy()[rows] == txn_type]
         
-        return results
+        # Apply amount range filters
+        if min_amount is not None:
+            min_amt = float(min_amount)
+            debit = frame['debit'].to_numpy()[rows]
+            credit = frame['credit'].to_numpy()[rows]
+            rows = rows[(debit >= min_amt) | (credit >= min_amt)]
+        
+        if max_amount is not None:
+            max_amt = float(max_amount)
+            debit = frame['debit'].to_numpy()[rows]
+            credit = frame['credit'].to_numpy()[rows]
+            rows = rows[(debit <= max_amt) | (credit <= max_amt)]
+        
+        return rows
+    
+    def _date_range_rows(self, date_from: Optional[str], date_to: Optional[str]) -> np.ndarray:
+        """Sorted row ids dated within [date_from, date_to] via binary search on the sorted dates"""
+        try:
+            start = np.datetime64(date_from, 'D') if date_from else None
+            end = np.datetime64(date_to, 'D') if date_to else None
+        except ValueError:
+            # Not an ISO date - fall back to comparing the raw strings
+            mask = np.ones(len(self._frame), dtype=bool)
+            if date_from:
+                mask &= (self._frame['date'] >= date_from).to_numpy()
+            if date_to:
+                mask &= (self._frame['date'] <= date_to).to_numpy()
+            return np.flatnonzero(mask)
+        
+        lo = int(np.searchsorted(self._dates_sorted, start, side='left')) if start is not None else 0
+        hi = int(np.searchsorted(self._dates_sorted, end, side='right')) if end is not None else len(self._dates_sorted)
+        return np.sort(self._date_order[lo:hi])
     
+    @synchronized
     def get_account_summary(self, account_name: Optional[str] = None) -> Dict:
         """
         Get summary for specific account or all accounts.
@@ -152,6 +550,11 @@ class StatementStore:
         Returns:
             Summary dictionary with balances and totals
         """
+        key = ("account_summary", account_name.lower() if account_name else None)
+        return self._memoized(key, lambda: self._compute_account_summary(account_name))
+    
+    def _compute_account_summary(self, account_name: Optional[str]) -> Dict:
+        """Build the account summary (uncached)"""
         if account_name:
             # Get specific account
             statements = [s for s in self.statements if s.get('account_name', '').lower() == account_name.lower()]
@@ -192,6 +595,7 @@ class StatementStore:
             "combined_debits": total_debits
         }
     
+    @synchronized
     def get_analytics(self, analytics_type: str, filters: Optional[Dict] = None) -> Dict:
         """
         Get analytics based on query type.
@@ -208,68 +612,79 @@ class StatementStore:
         Returns:
             Analytics dictionary
         """
-        # Apply filters if provided
-        if filters:
-            transactions = self.search_transactions(filters)
-        else:
-            transactions = self.all_transactions
-        
         if analytics_type == "balance":
             return self.get_account_summary(filters.get('account') if filters else None)
         
-        elif analytics_type == "spending":
-            total_debits = sum(t.get('debit', 0) for t in transactions)
+        key = ("analytics", analytics_type, self._filters_key(filters))
+        return self._memoized(key, lambda: self._compute_analytics(analytics_type, filters))
+    
+    def _aggregates(self, filters: Optional[Dict]) -> Dict:
+        """Debit/credit sums and counts over the filtered rows"""
+        if not filters:
+            return self._totals
+        
+        rows = self._filter_rows(filters)
+        debit = self._frame['debit'].to_numpy()
+        credit = self._frame['credit'].to_numpy()
+        if rows is not None:
+            debit, credit = debit[rows], credit[rows]
+        return {
+            "count": len(debit),
+            "debits": float(debit.sum()),
+            "credits": float(credit.sum()),
+            "debit_count": int(np.count_nonzero(debit > 0)),
+            "credit_count": int(np.count_nonzero(credit > 0)),
+        }
+    
+    def _compute_analytics(self, analytics_type: str, filters: Optional[Dict]) -> Dict:
+        """Compute analytics over the filtered rows (uncached)"""
+        if analytics_type == "spending":
+            totals = self._aggregates(filters)
             return {
-                "total_spending": total_debits,
-                "transaction_count": len([t for t in transactions if t.get('debit', 0) > 0]),
-                "average_transaction": total_debits / len(transactions) if transactions else 0
+                "total_spending": totals['debits'],
+                "transaction_count": totals['debit_count'],
+                "average_transaction": totals['debits'] / totals['count'] if totals['count'] else 0
             }
         
         elif analytics_type == "income":
-            total_credits = sum(t.get('credit', 0) for t in transactions)
+            totals = self._aggregates(filters)
             return {
-                "total_income": total_credits,
-                "transaction_count": len([t for t in transactions if t.get('credit', 0) > 0]),
-                "average_transaction": total_credits / len(transactions) if transactions else 0
+                "total_income": totals['credits'],
+                "transaction_count": totals['credit_count'],
+                "average_transaction": totals['credits'] / totals['count'] if totals['count'] else 0
             }
         
         elif analytics_type == "top_merchants":
-            # Extract merchant names from descriptions
-            merchant_spending = {}
-            
-            for t in transactions:
-                desc = t.get('description', '')
-                amount = t.get('debit', 0)
-                
-                if amount > 0:
-                    # Try to extract merchant name (between slashes in UPI)
-                    match = re.search(r'/([^/]+)/(?:Paymen|collec)', desc)
-                    if match:
-                        merchant = match.group(1).strip()
-                        merchant_spending[merchant] = merchant_spending.get(merchant, 0) + amount
+            rows = self._filter_rows(filters)
+            spent = self._frame[['description', 'debit']]
+            if rows is not None:
+                spent = spent.iloc[rows]
+            spent = spent[spent['debit'].to_numpy() > 0]
             
-            # Sort by spending
-            top_merchants = sorted(merchant_spending.items(), key=lambda x: x[1], reverse=True)[:10]
+            # One vectorized regex pass over the debit descriptions
+            merchants = spent['description'].str.extract(MERCHANT_PATTERN, expand=False).str.strip()
+            # sort=False + stable sort keeps first-seen order among ties; no-match rows (NaN) drop out
+            merchant_spending = spent['debit'].groupby(merchants, sort=False).sum()
+            top_merchants = merchant_spending.sort_values(ascending=False, kind='stable').head(10)
             
             return {
                 "top_merchants": [
-                    {"merchant": name, "total_spent": amount}
-                    for name, amount in top_merchants
+                    {"merchant": name, "total_spent": float(amount)}
+                    for name, amount in top_merchants.items()
                 ],
                 "unique_merchants": len(merchant_spending)
             }
         
         elif analytics_type == "summary":
-            total_credits = sum(t.get('credit', 0) for t in transactions)
-            total_debits = sum(t.get('debit', 0) for t in transactions)
+            totals = self._aggregates(filters)
             
             return {
-                "total_transactions": len(transactions),
-                "total_credits": total_credits,
-                "total_debits": total_debits,
-                "net_change": total_credits - total_debits,
-                "credit_count": len([t for t in transactions if t.get('credit', 0) > 0]),
-                "debit_count": len([t for t in transactions if t.get('debit', 0) > 0])
+                "total_transactions": totals['count'],
+                "total_credits": totals['credits'],
+                "total_debits": totals['debits'],
+                "net_change": totals['credits'] - totals['debits'],
+                "credit_count": totals['credit_count'],
+                "debit_count": totals['debit_count']
             }
         
         return {"error": "Unknown analytics type"}
@@ -283,4 +698,5 @@ def get_statement_store() -> StatementStore:
     global _statement_store
     if _statement_store is None:
         _statement_store = StatementStore()
+        _statement_store.start_watching()
     return _statement_store
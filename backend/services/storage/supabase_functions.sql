@@ -0,0 +1,77 @@
+-- Database-side helpers for services/storage/supabase_query.py
+-- Run once in the Supabase SQL editor (safe to re-run)
+
+-- Aggregates for get_analytics(): one row instead of every matching transaction.
+-- Filters mirror search_transactions(); NULL parameters are ignored.
+create or replace function txn_analytics(
+    p_account text default null,
+    p_from date default null,
+    p_to date default null,
+    p_type text default null,
+    p_method text default null,
+    p_description text default null,
+    p_min_amount numeric default null,
+    p_max_amount numeric default null
+)
+returns table (
+    total_debit numeric,
+    total_credit numeric,
+    debit_count int,
+    credit_count int,
+    txn_count int
+)
+language sql
+stable
+as $$
+    select
+        coalesce(sum(debit), 0),
+        coalesce(sum(credit), 0),
+        (count(*) filter (where debit > 0))::int,
+        (count(*) filter (where credit > 0))::int,
+        count(*)::int
+    from transactions
+    where (p_account is null or account_number = p_account)
+      and (p_from is null or date >= p_from)
+      and (p_to is null or date <= p_to)
+      and (p_type is null or transaction_type = p_type)
+      and (p_method is null or payment_method = p_method)
+      and (p_description is null
+           or description ilike '%' || replace(replace(replace(p_description, '\', '\\'), '%', '\%'), '_', '\_') || '%')
+      and (p_min_amount is null or debit >= p_min_amount or credit >= p_min_amount)
+      and (p_max_amount is null or debit <= p_max_amount or credit <= p_max_amount);
+$$;
+
+-- Trigram index so search_transactions()'s description ilike '%term%'
+-- filter doesn't scan the whole table
+create extension if not exists pg_trgm;
+create index if not exists transactions_description_trgm_idx
+    on transactions using gin (description gin_trgm_ops);
+
+-- Slim per-statement rows for get_account_summary(): only the summary
+-- columns, with the JSON totals unpacked, instead of select * (which
+-- ships the full data/metadata/validation JSON of every statement)
+create or replace view account_summary_v as
+select
+    account_number as account,
+    statement_period_from as period_from,
+    statement_period_to as period_to,
+    coalesce(opening_balance, 0) as opening_balance,
+    coalesce(closing_balance, 0) as closing_balance,
+    coalesce((data->>'total_credits')::numeric, 0) as total_credits,
+    coalesce((data->>'total_debits')::numeric, 0) as total_debits,
+    coalesce(transaction_count, 0) as transaction_count
+from bank_statements;
+
+-- Amounts are never NULL, so aggregates and clients can read debit/credit
+-- without a per-row NULL check
+update transactions set debit = 0 where debit is null;
+update transactions set credit = 0 where credit is null;
+alter table transactions
+    alter column debit set default 0,
+    alter column debit set not null,
+    alter column credit set default 0,
+    alter column credit set not null;
+
+-- recent_transactions(): newest-first per account reads only `limit` index entries
+create index if not exists transactions_account_date_id_idx
+    on transactions (account_number, date desc, id desc);
@@ -3,14 +3,117 @@ Supabase-based statement query service
 Replaces file-based storage with database queries for better performance
 """
 
+import asyncio
+import copy
+import math
 import os
 import logging
-from typing import Dict, List, Optional
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
+from operator import itemgetter
+
+import httpx
+import numpy as np
+from cachetools import TTLCache
+from postgrest.exceptions import APIError
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
+
+# orjson decodes large row lists several times faster than the stdlib; optional
+try:
+    import orjson
+    from postgrest.base_request_builder import APIResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Compute analytics with the txn_analytics() SQL function (supabase_functions.sql)
+USE_ANALYTICS_RPC = os.getenv("SUPABASE_ANALYTICS_RPC", "true").lower() == "true"
+
+# Bounded keep-alive pool for PostgREST calls (stays under the Supavisor pooler's limits)
+REQUEST_TIMEOUT_SECONDS = 10
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+
+# Transient errors (transport failures, 5xx responses) are retried with
+# jittered exponential backoff; after BREAKER_FAIL_MAX consecutive failed calls, queries fail fast for
+# BREAKER_RESET_SECONDS instead of each waiting out the timeout
+EXECUTE_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.05
+RETRY_MAX_DELAY = 1.0
+BREAKER_FAIL_MAX = 5
+BREAKER_RESET_SECONDS = 30
+
+# Summary/analytics results cache; entries are also dropped when their account is re-ingested
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_TTL_SECONDS = 60
+ALL_ACCOUNTS = "*"  # tag for results computed across every account
+
+# Columns of account_summary_v (supabase_functions.sql), in summary order
+SUMMARY_COLUMNS = (
+    "account", "period_from", "period_to", "opening_balance", "closing_balance",
+    "total_credits", "total_debits", "transaction_count"
+)
+
+# Rows per transactions request (PostgREST's default max-rows)
+PAGE_SIZE = 1000
+
+
+def _like_escape(term: str) -> str:
+    """Escape LIKE wildcards so the term matches literally"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Whether a failed PostgREST call is worth retrying: transport errors and
+    5xx responses. postgrest-py's APIError carries the PostgREST/SQLSTATE code
+    rather than the HTTP status - the status only when the body wasn't JSON
+    """
+    if isinstance(error, httpx.TransportError):
+        return True
+    if not isinstance(error, APIError):
+        return False
+    code = str(error.code or "")
+    if code.isdigit() and len(code) == 3:
+        return int(code) >= 500
+    # PGRST000-003: database unreachable / pool timeout (503/504); SQLSTATE
+    # classes 08 connection, 53 resources, 57 operator intervention,
+    # 58 system and XX internal errors all surface as 5xx
+    return code.startswith("PGRST00") or code[:2] in ("08", "53", "57", "58", "XX")
+
+
+def _use_orjson_responses():
+    """
+    Decode PostgREST list responses with orjson. postgrest-py has no
+    json_loads option, so APIResponse's constructor from an httpx
+    response is replaced with an equivalent that parses the raw bytes.
+    """
+    if not ORJSON_AVAILABLE or not hasattr(APIResponse, "_get_count_from_http_request_response"):
+        return
+    
+    def from_http_request_response(cls, request_response):
+        try:
+            data = orjson.loads(request_response.content)
+        except orjson.JSONDecodeError:
+            return cls(data=[], count=0)
+        count = cls._get_count_from_http_request_response(request_response)
+        return cls(data=data, count=count)
+    
+    APIResponse.from_http_request_response = classmethod(from_http_request_response)
+
+
+_use_orjson_responses()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of querying while Supabase is failing"""
+    pass
+
 
 class SupabaseStatementQuery:
     """
@@ -23,19 +126,88 @@ class SupabaseStatementQuery:
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_KEY")
         
+        self._cache: TTLCache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_SECONDS)
+        self._tags: Dict[str, set] = {}  # account -> cache keys computed from its rows
+        self._cache_lock = threading.Lock()
+        self._failures = 0  # consecutive failed calls
+        self._open_until = 0.0
+        self._breaker_lock = threading.Lock()
+        
         if not url or not key:
             logger.warning("Supabase not configured")
             self.enabled = False
             return
         
         try:
-            self.client: Client = create_client(url, key)
+            options = SyncClientOptions(
+                postgrest_client_timeout=REQUEST_TIMEOUT_SECONDS,
+                storage_client_timeout=REQUEST_TIMEOUT_SECONDS
+            )
+            self.client: Client = create_client(url, key, options=options)
+            self._use_pooled_session()
             self.enabled = True
+            self.use_rpc = USE_ANALYTICS_RPC
+            self.use_summary_view = True
             logger.info("Supabase query service initialized")
         except Exception as e:
             logger.error(f"Supabase initialization failed: {e}")
             self.enabled = False
     
+    def _use_pooled_session(self):
+        """
+        Swap the PostgREST client's default httpx session for one with
+        bounded pool limits and HTTP/2, reused for every query.
+        supabase 2.15 has no option for passing an httpx client in.
+        """
+        postgrest = self.client.postgrest
+        default = postgrest.session
+        postgrest.session = httpx.Client(
+            base_url=default.base_url,
+            headers=default.headers,
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            limits=POOL_LIMITS,
+            http2=True,
+            follow_redirects=True
+        )
+        default.close()
+    
+    def _execute(self, query):
+        """
+        Execute a PostgREST request with retries on transient errors (network
+        failures and 5xx responses), behind a circuit breaker. Every failed
+        call counts toward opening the breaker; 4xx errors aren't retried.
+        
+        Raises:
+            CircuitOpenError: Recent calls kept failing; retry after the reset window
+        """
+        with self._breaker_lock:
+            if time.monotonic() < self._open_until:
+                raise CircuitOpenError("Supabase circuit open after repeated failures")
+        
+        for attempt in range(1, EXECUTE_ATTEMPTS + 1):
+            try:
+                result = query.execute()
+                break
+            except Exception as e:
+                if attempt == EXECUTE_ATTEMPTS or not _is_transient(e):
+                    self._record_failure()
+                    raise
+                delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+                logger.warning(f"Supabase request failed ({type(e).__name__}), retry {attempt}/{EXECUTE_ATTEMPTS - 1} in {delay:.2f}s")
+                time.sleep(delay)
+        
+        with self._breaker_lock:
+            self._failures = 0
+        return result
+    
+    def _record_failure(self):
+        with self._breaker_lock:
+            self._failures += 1
+            if self._failures >= BREAKER_FAIL_MAX:
+                # Open (or re-open after a failed half-open probe)
+                self._open_until = time.monotonic() + BREAKER_RESET_SECONDS
+                logger.error(f"Supabase circuit open for {BREAKER_RESET_SECONDS}s after {self._failures} failures")
+    
     def search_transactions(self, filters: Dict) -> List[Dict]:
         """
         Search transactions using the transactions table (MUCH faster!)
@@ -50,57 +222,159 @@ class SupabaseStatementQuery:
                 - payment_method: 'UPI', 'NEFT', etc.
         
         Returns:
-            List of matching transactions
+            List of matching transactions, by date (undated last), then id
         """
         if not self.enabled:
             return []
         
         try:
-            # Start with base query on transactions table
-            query = self.client.table("transactions").select("*")
-            
-            # Apply filters at database level (FAST!)
-            if filters.get('account'):
-                query = query.eq("account_number", filters['account'])
-            
-            if filters.get('date_from'):
-                query = query.gte("date", filters['date_from'])
+            return list(self.iter_transactions(filters))
             
-            if filters.get('date_to'):
-                query = query.lte("date", filters['date_to'])
-            
-            if filters.get('transaction_type'):
-                query = query.eq("transaction_type", filters['transaction_type'])
-            
-            if filters.get('payment_method'):
-                query = query.eq("payment_method", filters['payment_method'])
-            
-            # Execute query
-            result = query.execute()
-            transactions = result.data
-            
-            # Apply remaining filters in memory (for complex searches)
-            if filters.get('description_contains'):
-                search_term = filters['description_contains'].lower()
-                transactions = [t for t in transactions 
-                              if search_term in t.get('description', '').lower()]
-            
-            if filters.get('min_amount') is not None:
-                min_amt = float(filters['min_amount'])
-                transactions = [t for t in transactions 
-                              if (t.get('debit', 0) >= min_amt or t.get('credit', 0) >= min_amt)]
-            
-            if filters.get('max_amount') is not None:
-                max_amt = float(filters['max_amount'])
-                transactions = [t for t in transactions 
-                              if (t.get('debit', 0) <= max_amt or t.get('credit', 0) <= max_amt)]
+        except Exception as e:
+            logger.error(f"Transaction search failed: {e}")
+            return []
+    
+    def iter_transactions(self, filters: Dict, columns: str = "*") -> Iterator[Dict]:
+        """
+        Stream transactions matching filters, PAGE_SIZE rows per request.
+        Pages are keyset-ordered on (date, id) with undated rows last, so
+        results aren't cut off at PostgREST's max-rows limit and callers can
+        stop early.
+        
+        Args:
+            filters: Search criteria (see search_transactions)
+            columns: PostgREST select list (must include id and date)
+        
+        Yields:
+            Matching transactions
+        """
+        last = None
+        while True:
+            # ASC puts NULL dates last in Postgres
+            query = self._transactions_query(filters, columns).order("date").order("id").limit(PAGE_SIZE)
+            if last is not None:
+                last_date, last_id = last['date'], last['id']
+                if last_date is None:
+                    # Already into the undated tail - every dated row was returned
+                    query = query.is_("date", "null").gt("id", last_id)
+                else:
+                    # A row comparison would drop NULL dates, so they're matched explicitly
+                    query = query.or_(
+                        f"date.gt.{last_date},and(date.eq.{last_date},id.gt.{last_id}),date.is.null"
+                    )
             
-            return transactions
+            rows = self._execute(query).data
+            yield from rows
+            if len(rows) < PAGE_SIZE:
+                return
+            last = rows[-1]
+    
+    def recent_transactions(self, account: Optional[str] = None, limit: int = 200) -> List[Dict]:
+        """
+        Most recent transactions, newest first - served from the
+        (account_number, date desc, id desc) index without scanning the account
+        
+        Args:
+            account: Account number, or None for all accounts
+            limit: Number of transactions to return
+        
+        Returns:
+            Up to limit transactions (undated rows are skipped)
+        """
+        if not self.enabled:
+            return []
+        
+        try:
+            query = self.client.table("transactions").select("*")
+            if account:
+                query = query.eq("account_number", account)
+            # DESC sorts NULLs first in Postgres, so undated rows are filtered out
+            query = query.not_.is_("date", "null").order("date", desc=True).order("id", desc=True).limit(limit)
+            return self._execute(query).data
             
         except Exception as e:
-            logger.error(f"Transaction search failed: {e}")
+            logger.error(f"Recent transactions query failed: {e}")
             return []
     
+    def _transactions_query(self, filters: Dict, columns: str = "*"):
+        """Transactions query with every filter applied at database level"""
+        # Start with base query on transactions table
+        query = self.client.table("transactions").select(columns)
+        
+        # Apply filters at database level (FAST!)
+        if filters.get('account'):
+            query = query.eq("account_number", filters['account'])
+        
+        if filters.get('date_from'):
+            query = query.gte("date", filters['date_from'])
+        
+        if filters.get('date_to'):
+            query = query.lte("date", filters['date_to'])
+        
+        if filters.get('transaction_type'):
+            query = query.eq("transaction_type", filters['transaction_type'])
+        
+        if filters.get('payment_method'):
+            query = query.eq("payment_method", filters['payment_method'])
+        
+        # Substring/amount filters too - only matching rows cross the wire
+        if filters.get('description_contains'):
+            query = query.ilike("description", f"%{_like_escape(filters['description_contains'])}%")
+        
+        if filters.get('min_amount') is not None:
+            min_amt = float(filters['min_amount'])
+            query = query.or_(f"debit.gte.{min_amt},credit.gte.{min_amt}")
+        
+        if filters.get('max_amount') is not None:
+            max_amt = float(filters['max_amount'])
+            query = query.or_(f"debit.lte.{max_amt},credit.lte.{max_amt}")
+        
+        return query
+    
+    def _cached(self, kind: str, filters: Dict, compute) -> Dict:
+        """
+        Return a cached result for (kind, filters), computing it on a miss.
+        Results are tagged with their account so invalidate_account() can
+        drop exactly the entries a new ingest makes stale.
+        """
+        try:
+            key = (kind, frozenset(filters.items()))
+        except TypeError:
+            # Unhashable filter value (e.g. a list from extracted JSON) - don't cache
+            return compute()
+        
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
+        result = compute()
+        if "error" not in result:
+            tag = filters.get('account') or ALL_ACCOUNTS
+            with self._cache_lock:
+                self._cache[key] = result
+                keys = self._tags.setdefault(tag, set())
+                keys.add(key)
+                if len(keys) > RESULT_CACHE_SIZE:  # forget expired/evicted keys
+                    self._tags[tag] = {k for k in keys if k in self._cache}
+        return copy.deepcopy(result)
+    
+    def invalidate_account(self, account_number: Optional[str]):
+        """
+        Drop cached results that include an account's transactions
+        
+        Args:
+            account_number: Account whose data changed (None drops everything)
+        """
+        with self._cache_lock:
+            if account_number is None:
+                self._cache.clear()
+                self._tags.clear()
+                return
+            for tag in (account_number, ALL_ACCOUNTS):
+                for key in self._tags.pop(tag, ()):
+                    self._cache.pop(key, None)
+    
     def get_account_summary(self, account_number: Optional[str] = None) -> Dict:
         """
         Get account summary from database
@@ -111,40 +385,20 @@ class SupabaseStatementQuery:
         Returns:
             Summary dictionary
         """
+        filters = {'account': account_number} if account_number else {}
+        return self._cached("balance", filters, lambda: self._compute_account_summary(account_number))
+    
+    def _compute_account_summary(self, account_number: Optional[str]) -> Dict:
+        """Query bank_statements and total the per-account summaries"""
         if not self.enabled:
             return {"total_accounts": 0, "accounts": [], "combined_balance": 0, "combined_credits": 0, "combined_debits": 0}
         
         try:
-            query = self.client.table("bank_statements").select("*")
+            summaries = self._statement_summaries(account_number)
             
-            if account_number:
-                query = query.eq("account_number", account_number)
-            
-            result = query.execute()
-            
-            summaries = []
-            total_balance = 0.0
-            total_credits = 0.0
-            total_debits = 0.0
-            
-            for row in result.data:
-                data = row.get('data', {})
-                
-                summary = {
-                    "account": row.get('account_number'),
-                    "period_from": row.get('statement_period_from'),
-                    "period_to": row.get('statement_period_to'),
-                    "opening_balance": row.get('opening_balance', 0) or 0,
-                    "closing_balance": row.get('closing_balance', 0) or 0,
-                    "total_credits": data.get('total_credits', 0) or 0,
-                    "total_debits": data.get('total_debits', 0) or 0,
-                    "transaction_count": row.get('transaction_count', 0) or 0
-                }
-                
-                summaries.append(summary)
-                total_balance += summary['closing_balance']
-                total_credits += summary['total_credits']
-                total_debits += summary['total_debits']
+            total_balance = math.fsum(map(itemgetter('closing_balance'), summaries))
+            total_credits = math.fsum(map(itemgetter('total_credits'), summaries))
+            total_debits = math.fsum(map(itemgetter('total_debits'), summaries))
             
             return {
                 "accounts": summaries,
@@ -158,6 +412,42 @@ class SupabaseStatementQuery:
             logger.error(f"Account summary failed: {e}")
             return {"total_accounts": 0, "accounts": [], "combined_balance": 0, "combined_credits": 0, "combined_debits": 0, "error": str(e)}
     
+    def _statement_summaries(self, account_number: Optional[str]) -> List[Dict]:
+        """Per-statement summary rows, from account_summary_v when it is installed"""
+        if self.use_summary_view:
+            try:
+                query = self.client.table("account_summary_v").select(",".join(SUMMARY_COLUMNS))
+                if account_number:
+                    query = query.eq("account", account_number)
+                return self._execute(query).data
+            except Exception as e:
+                logger.warning(f"account_summary_v query failed, reading bank_statements: {e}")
+                if "42P01" in str(e) or "PGRST205" in str(e):  # view not installed - stop trying
+                    self.use_summary_view = False
+        
+        query = self.client.table("bank_statements").select("*")
+        
+        if account_number:
+            query = query.eq("account_number", account_number)
+        
+        result = self._execute(query)
+        
+        summaries = []
+        for row in result.data:
+            data = row.get('data', {})
+            
+            summaries.append({
+                "account": row.get('account_number'),
+                "period_from": row.get('statement_period_from'),
+                "period_to": row.get('statement_period_to'),
+                "opening_balance": row.get('opening_balance', 0) or 0,
+                "closing_balance": row.get('closing_balance', 0) or 0,
+                "total_credits": data.get('total_credits', 0) or 0,
+                "total_debits": data.get('total_debits', 0) or 0,
+                "transaction_count": row.get('transaction_count', 0) or 0
+            })
+        return summaries
+    
     def get_analytics(self, analytics_type: str, filters: Optional[Dict] = None) -> Dict:
         """
         Get analytics using database queries
@@ -175,47 +465,138 @@ class SupabaseStatementQuery:
         if analytics_type == "balance":
             return self.get_account_summary(filters.get('account') if filters else None)
         
-        # For other analytics, get transactions and calculate
-        transactions = self.search_transactions(filters or {})
+        if analytics_type not in ("spending", "income", "summary"):
+            return {"error": "Unknown analytics type"}
+        
+        filters = filters or {}
+        return self._cached(analytics_type, filters, lambda: self._compute_analytics(analytics_type, filters))
+    
+    def _compute_analytics(self, analytics_type: str, filters: Dict) -> Dict:
+        """Build spending/income/summary analytics from the aggregate totals"""
+        try:
+            totals = self._aggregates(filters)
+        except Exception as e:
+            logger.error(f"Analytics failed: {e}")
+            return {"error": str(e)}
         
         if analytics_type == "spending":
-            total_debits = sum(t.get('debit', 0) for t in transactions)
+            total_debits = totals['total_debit']
             return {
                 "total_spending": total_debits,
-                "transaction_count": len([t for t in transactions if t.get('debit', 0) > 0]),
-                "average_transaction": total_debits / len(transactions) if transactions else 0
+                "transaction_count": totals['debit_count'],
+                "average_transaction": total_debits / totals['txn_count'] if totals['txn_count'] else 0
             }
         
         elif analytics_type == "income":
-            total_credits = sum(t.get('credit', 0) for t in transactions)
+            total_credits = totals['total_credit']
             return {
                 "total_income": total_credits,
-                "transaction_count": len([t for t in transactions if t.get('credit', 0) > 0]),
-                "average_transaction": total_credits / len(transactions) if transactions else 0
+                "transaction_count": totals['credit_count'],
+                "average_transaction": total_credits / totals['txn_count'] if totals['txn_count'] else 0
             }
         
-        elif analytics_type == "summary":
-            total_credits = sum(t.get('credit', 0) for t in transactions)
-            total_debits = sum(t.get('debit', 0) for t in transactions)
-            
-            return {
-                "total_transactions": len(transactions),
-                "total_credits": total_credits,
-                "total_debits": total_debits,
-                "net_change": total_credits - total_debits,
-                "credit_count": len([t for t in transactions if t.get('credit', 0) > 0]),
-                "debit_count": len([t for t in transactions if t.get('debit', 0) > 0])
-            }
+        # summary
+        return {
+            "total_transactions": totals['txn_count'],
+            "total_credits": totals['total_credit'],
+            "total_debits": totals['total_debit'],
+            "net_change": totals['total_credit'] - totals['total_debit'],
+            "credit_count": totals['credit_count'],
+            "debit_count": totals['debit_count']
+        }
+    
+    async def get_analytics_bulk(self, analytics_types: List[str], filters: Optional[Dict] = None) -> Dict[str, Dict]:
+        """
+        Run several analytics concurrently instead of one round trip after another
+        
+        Args:
+            analytics_types: Analytics to compute (balance, spending, income, summary)
+            filters: Optional filters applied to every analytic
         
-        return {"error": "Unknown analytics type"}
+        Returns:
+            Analytics dictionary per type
+        """
+        # The pooled sync client is thread-safe, so each query runs on its own worker thread
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self.get_analytics, analytics_type, filters)
+            for analytics_type in analytics_types
+        ))
+        return dict(zip(analytics_types, results))
+    
+    def _aggregates(self, filters: Dict) -> Dict:
+        """
+        Debit/credit totals and counts over the transactions matching filters.
+        Runs as a single-row SQL aggregate; falls back to summing fetched rows
+        when the RPC is disabled or not installed.
+        """
+        if self.use_rpc:
+            try:
+                params = {
+                    "p_account": filters.get('account'),
+                    "p_from": filters.get('date_from'),
+                    "p_to": filters.get('date_to'),
+                    "p_type": filters.get('transaction_type'),
+                    "p_method": filters.get('payment_method'),
+                    "p_description": filters.get('description_contains'),
+                    "p_min_amount": filters.get('min_amount'),
+                    "p_max_amount": filters.get('max_amount')
+                }
+                result = self._execute(self.client.rpc("txn_analytics", params))
+                row = result.data[0] if isinstance(result.data, list) else result.data
+                return {
+                    "total_debit": float(row['total_debit'] or 0),
+                    "total_credit": float(row['total_credit'] or 0),
+                    "debit_count": int(row['debit_count'] or 0),
+                    "credit_count": int(row['credit_count'] or 0),
+                    "txn_count": int(row['txn_count'] or 0)
+                }
+            except Exception as e:
+                logger.warning(f"txn_analytics RPC failed, aggregating in Python: {e}")
+                if "PGRST202" in str(e):  # function not installed - stop trying
+                    self.use_rpc = False
+        
+        # (debit, credit) pairs straight off the page stream - no row list is kept
+        amounts = np.fromiter(
+            # NULL amounts are still guarded: this path serves databases without supabase_functions.sql
+            ((t['debit'] or 0.0, t['credit'] or 0.0) for t in self.iter_transactions(filters, "id,date,debit,credit")),
+            dtype=np.dtype((np.float64, 2))
+        )
+        debits, credits = amounts[:, 0], amounts[:, 1]
+        return {
+            "total_debit": float(debits.sum()),
+            "total_credit": float(credits.sum()),
+            "debit_count": int((debits > 0).sum()),
+            "credit_count": int((credits > 0).sum()),
+            "txn_count": len(amounts)
+        }
 
 
 # Singleton instance
 _query_service = None
+_query_service_lock = threading.Lock()
 
 def get_supabase_query() -> SupabaseStatementQuery:
     """Get or create Supabase query service"""
     global _query_service
     if _query_service is None:
-        _query_service = SupabaseStatementQuery()
+        with _query_service_lock:
+            if _query_service is None:
+                _query_service = SupabaseStatementQuery()
     return _query_service
+
+
+def warmup():
+    """Create the query service and open a pooled connection ahead of the first request"""
+    service = get_supabase_query()
+    if not service.enabled:
+        return
+    try:
+        service._execute(service.client.table("bank_statements").select("statement_id").limit(1))
+    except Exception as e:
+        logger.warning(f"Supabase warmup failed: {e}")
+
+
+def invalidate_account(account_number: Optional[str]):
+    """Drop cached analytics for an account after its statements change"""
+    if _query_service is not None:
+        _query_service.invalidate_account(account_number)
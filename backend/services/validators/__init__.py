@@ -3,14 +3,37 @@ Validation services for bank statement intelligence
 Provides validators for balance continuity, date sequencing, income analysis, and cross-document consistency
 """
 
-from .balance_validator import BalanceValidator
-from .date_validator import DateSequencingValidator
-from .validation_models import ValidationResult, ValidationError, ValidationWarning
+import importlib
+
+# Exports resolved on first access (PEP 562) - importing one validator
+# doesn't load the others
+_LAZY_EXPORTS = {
+    'BalanceValidator': '.balance_validator',
+    'TransactionColumns': '.balance_validator',
+    'DateSequencingValidator': '.date_validator',
+    'ValidationResult': '.validation_models',
+    'ValidationError': '.validation_models',
+    'ValidationWarning': '.validation_models'
+}
 
 __all__ = [
     'BalanceValidator',
+    'TransactionColumns',
     'DateSequencingValidator',
     'ValidationResult',
     'ValidationError',
     'ValidationWarning'
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # cache - later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
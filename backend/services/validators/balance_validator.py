@@ -4,9 +4,15 @@ Validates that balances in bank statements are mathematically correct and contin
 """
 
 import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Dict, List, Optional
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal, ROUND_FLOOR, ROUND_HALF_UP
 
+import numpy as np
+
+from .balance_validator_kernel import check_balances as _compiled_walk
 from .validation_models import (
     ValidationResult,
     ValidationError,
@@ -16,6 +22,111 @@ from .validation_models import (
 
 logger = logging.getLogger(__name__)
 
+# Thousands separators, whitespace and currency symbols stripped before parsing
+_CLEAN_RE = re.compile(r'[,\s$₹]')
+_Q = Decimal('0.01')
+
+# Stands in for an unparseable amount in int64 cents arrays
+_MISSING = np.iinfo(np.int64).min
+
+# Plain "[-]123.45" amounts, parsed to cents without going through Decimal
+_AMOUNT_RE = re.compile(r'([+-]?)(\d*)(?:\.(\d*))?')
+
+
+def _fmt(cents: int) -> str:
+    """Format cents as an exact 2-decimal amount string"""
+    sign = '-' if cents < 0 else ''
+    whole, frac = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+
+@lru_cache(maxsize=4096)
+def _parse_cents(value: str) -> Optional[int]:
+    """Parse an amount string to integer cents (half-up), None if invalid"""
+    # Remove commas, whitespace and currency symbols in one pass
+    text = _CLEAN_RE.sub('', value)
+    
+    match = _AMOUNT_RE.fullmatch(text)
+    if match and (match.group(2) or match.group(3)):
+        sign, whole, frac = match.groups()
+        frac = frac or ''
+        cents = int(whole or 0) * 100 + int(frac[:2].ljust(2, '0'))
+        if frac[2:3] >= '5':
+            cents += 1  # half-up on the magnitude, like ROUND_HALF_UP
+        return -cents if sign == '-' else cents
+    
+    # Exponents and anything else unusual go through Decimal
+    try:
+        decimal_value = Decimal(text).quantize(_Q, rounding=ROUND_HALF_UP)
+        return int(decimal_value * 100)
+    except (ArithmeticError, ValueError, TypeError):
+        logger.warning("Could not convert '%s' to cents", value)
+        return None
+
+
+@dataclass
+class TransactionColumns:
+    """
+    Transactions as columns (one int64 cents array per amount) instead of a
+    list of dicts. Built once with from_rows() and passed to
+    BalanceValidator.validate_statement() as statement_data['transactions_columns'],
+    where totals and the clean-statement check run without per-row Python work.
+    """
+    debit_cents: np.ndarray
+    credit_cents: np.ndarray
+    balance_cents: np.ndarray  # 0 where no balance is stated
+    has_balance: np.ndarray
+    date: List[Optional[str]] = field(default_factory=list)
+    description: List[str] = field(default_factory=list)
+    
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> "TransactionColumns":
+        """
+        Convert transaction dicts to columns
+        
+        Missing or None debits/credits count as 0.
+        Raises ValueError on an amount that can't be parsed - validate the
+        dict rows instead to get per-row errors for those.
+        """
+        debits, credits, balances = [], [], []
+        for idx, row in enumerate(rows):
+            debit = row.get('debit')
+            credit = row.get('credit')
+            debit = 0 if debit is None else BalanceValidator._to_cents(debit)
+            credit = 0 if credit is None else BalanceValidator._to_cents(credit)
+            if debit is None or credit is None:
+                raise ValueError(f"Transaction {idx + 1}: unparseable debit/credit")
+            debits.append(debit)
+            credits.append(credit)
+            balances.append(BalanceValidator._to_cents(row.get('balance')))
+        
+        return cls(
+            debit_cents=np.array(debits, dtype=np.int64),
+            credit_cents=np.array(credits, dtype=np.int64),
+            balance_cents=np.array([0 if b is None else b for b in balances], dtype=np.int64),
+            has_balance=np.array([b is not None for b in balances], dtype=bool),
+            date=[row.get('date') for row in rows],
+            description=[row.get('description', '') for row in rows]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.debit_cents)
+    
+    def __getitem__(self, idx: int) -> Dict:
+        """Date/description of one row, in the shape of a transaction dict"""
+        return {
+            'date': self.date[idx] if self.date else None,
+            'description': self.description[idx] if self.description else ''
+        }
+    
+    def to_rows(self) -> List[tuple]:
+        """(debit, credit, stated balance or None) cents per row"""
+        balances = [
+            balance if stated else None
+            for balance, stated in zip(self.balance_cents.tolist(), self.has_balance.tolist())
+        ]
+        return list(zip(self.debit_cents.tolist(), self.credit_cents.tolist(), balances))
 
 class BalanceValidator:
     """
@@ -27,47 +138,70 @@ class BalanceValidator:
     3. Sequential statements have continuous balances
     """
     
-    def __init__(self, tolerance: float = 0.01):
+    def __init__(self, tolerance: float = 0.01, max_errors: int = 50):
         """
         Initialize balance validator
         
         Args:
             tolerance: Acceptable difference for rounding errors (default 0.01)
+            max_errors: Transaction balance mismatches reported individually;
+                any further ones are collapsed into one summary error
         """
         self.tolerance = Decimal(str(tolerance))
+        # Amounts are compared as integer cents: |diff| / 100 > tolerance
+        # <=> |diff| > floor(tolerance * 100)
+        self.tolerance_cents = int((self.tolerance * 100).to_integral_value(rounding=ROUND_FLOOR))
+        self.max_errors = max_errors
         self.validator_name = "balance_validator"
     
-    def validate_statement(self, statement_data: Dict) -> ValidationResult:
+    def validate_statement(
+        self,
+        statement_data: Dict,
+        result: Optional[ValidationResult] = None
+    ) -> ValidationResult:
         """
         Validate all balance checks for a single statement
         
         Args:
             statement_data: Extracted bank statement data
+            result: Existing result to reset and fill instead of allocating
+                a new one (batch jobs validating statements in a loop)
             
         Returns:
             ValidationResult with all balance validation errors/warnings
         """
-        result = ValidationResult(
-            validator_name=self.validator_name,
-            status="passed",
-            passed=True,
-            metadata={
-                "tolerance": float(self.tolerance)
-            }
-        )
+        metadata = {
+            "tolerance": float(self.tolerance)
+        }
+        if result is None:
+            result = ValidationResult(
+                validator_name=self.validator_name,
+                status="passed",
+                passed=True,
+                metadata=metadata
+            )
+        else:
+            result.validator_name = self.validator_name
+            result.reset(metadata)
         
-        # Check 1: Validate opening/closing balance calculation
-        self._validate_opening_closing(statement_data, result)
+        # Statement-level amounts, parsed once for all checks
+        parsed = {
+            'opening': self._to_cents(statement_data.get('opening_balance')),
+            'closing': self._to_cents(statement_data.get('closing_balance')),
+            'total_credits': self._to_cents(statement_data.get('total_credits')),
+            'total_debits': self._to_cents(statement_data.get('total_debits'))
+        }
         
-        # Check 2: Validate individual transaction balances
-        self._validate_transaction_balances(statement_data, result)
+        # Check 1: Validate opening/closing balance calculation
+        self._validate_opening_closing(statement_data, parsed, result)
         
-        # Check 3: Validate totals match sum of transactions
-        self._validate_totals(statement_data, result)
+        # Checks 2 and 3: Validate individual transaction balances and that
+        # totals match sum of transactions, in one pass over the rows
+        self._validate_transactions_and_totals(statement_data, parsed, result)
         
         logger.info(
-            f"[BalanceValidator] Validation complete: "
-            f"{result.error_count} errors, {result.warning_count} warnings"
+            "[BalanceValidator] Validation complete: %d errors, %d warnings",
+            result.error_count, result.warning_count
         )
         
         return result
@@ -75,14 +209,16 @@ class BalanceValidator:
     def _validate_opening_closing(
         self,
         statement_data: Dict,
+        parsed: Dict,
         result: ValidationResult
     ):
         """Validate: closing_balance = opening_balance + credits - debits"""
         try:
-            opening = self._to_decimal(statement_data.get('opening_balance'))
-            closing = self._to_decimal(statement_data.get('closing_balance'))
-            total_credits = self._to_decimal(statement_data.get('total_credits', 0))
-            total_debits = self._to_decimal(statement_data.get('total_debits', 0))
+            opening = parsed['opening']
+            closing = parsed['closing']
+            # Totals absent from the statement count as 0 here
+            total_credits = parsed['total_credits'] if 'total_credits' in statement_data else 0
+            total_debits = parsed['total_debits'] if 'total_debits' in statement_data else 0
             
             # Check if required fields are present
             if opening is None or closing is None:
@@ -96,52 +232,55 @@ class BalanceValidator:
             
             # Calculate expected closing balance
             expected_closing = opening + total_credits - total_debits
-            difference = abs(closing - expected_closing)
+            difference = closing - expected_closing
             
-            if difference > self.tolerance:
+            if difference > self.tolerance_cents or -difference > self.tolerance_cents:
                 result.add_error(
                     error_type=ValidationErrorType.BALANCE_MISMATCH,
                     message=(
                         f"Closing balance mismatch. "
-                        f"Expected: {expected_closing:.2f}, "
-                        f"Actual: {closing:.2f}, "
-                        f"Difference: {difference:.2f}"
+                        f"Expected: {_fmt(expected_closing)}, "
+                        f"Actual: {_fmt(closing)}, "
+                        f"Difference: {_fmt(abs(difference))}"
                     ),
                     severity=ValidationSeverity.ERROR,
                     field="closing_balance",
-                    expected=float(expected_closing),
-                    actual=float(closing),
+                    expected=expected_closing / 100,
+                    actual=closing / 100,
                     context={
-                        "opening_balance": float(opening),
-                        "total_credits": float(total_credits),
-                        "total_debits": float(total_debits),
-                        "calculation": f"{opening} + {total_credits} - {total_debits}"
+                        "opening_balance": opening / 100,
+                        "total_credits": total_credits / 100,
+                        "total_debits": total_debits / 100,
+                        "calculation": f"{_fmt(opening)} + {_fmt(total_credits)} - {_fmt(total_debits)}"
                     }
                 )
-            elif difference > 0:
+            elif difference:
                 # Small difference within tolerance - add warning
                 result.add_warning(
                     warning_type="minor_balance_difference",
-                    message=f"Minor rounding difference in closing balance: {difference:.2f}",
+                    message=f"Minor rounding difference in closing balance: {_fmt(abs(difference))}",
                     field="closing_balance",
                     recommendation="Verify rounding rules with bank"
                 )
         
         except Exception as e:
-            logger.error(f"Error validating opening/closing balance: {e}")
+            logger.error("Error validating opening/closing balance: %s", e)
             result.add_error(
                 error_type=ValidationErrorType.CALCULATION_ERROR,
                 message=f"Failed to validate opening/closing balance: {str(e)}",
                 severity=ValidationSeverity.ERROR
             )
     
-    def _validate_transaction_balances(
+    def _validate_transactions_and_totals(
         self,
         statement_data: Dict,
+        parsed: Dict,
         result: ValidationResult
     ):
-        """Validate each transaction's balance calculation"""
-        transactions = statement_data.get('transactions', [])
+        """Validate each transaction's balance calculation and the credit/debit totals"""
+        transactions = statement_data.get('transactions_columns')
+        if transactions is None:
+            transactions = statement_data.get('transactions', [])
         
         if not transactions:
             result.add_warning(
@@ -151,48 +290,107 @@ class BalanceValidator:
             )
             return
         
-        opening_balance = self._to_decimal(statement_data.get('opening_balance'))
-        if opening_balance is None:
-            return  # Already flagged in previous check
+        opening_balance = parsed['opening']
+        stated_credits = parsed['total_credits']
+        stated_debits = parsed['total_debits']
+        
+        # Totals are only summed when the statement states one to compare against
+        need_totals = stated_credits is not None or stated_debits is not None
+        
+        # Balances are walked only with a known opening balance (a missing one
+        # is already flagged). Clean statements pass in one vectorized check;
+        # anything else gets the row-by-row walk, which produces the detailed errors
+        if isinstance(transactions, TransactionColumns):
+            # Already parsed - totals and the clean check are pure NumPy
+            check_balances = opening_balance is not None and not (
+                transactions.has_balance.all()
+                and self._columns_consistent(
+                    opening_balance,
+                    transactions.debit_cents,
+                    transactions.credit_cents,
+                    transactions.balance_cents
+                )
+            )
+            rows = None  # built below only if the walk is needed
+            actual_credits = int(transactions.credit_cents.sum()) if stated_credits is not None else 0
+            actual_debits = int(transactions.debit_cents.sum()) if stated_debits is not None else 0
+            sum_rows = False
+        else:
+            rows = [
+                (
+                    # A blank debit/credit cell is a zero amount
+                    self._to_cents(transaction.get('debit') or 0),
+                    self._to_cents(transaction.get('credit') or 0),
+                    self._to_cents(transaction.get('balance'))
+                )
+                for transaction in transactions
+            ]
+            check_balances = (
+                opening_balance is not None
+                and not self._balances_consistent(opening_balance, rows)
+            )
+            actual_credits = actual_debits = 0
+            sum_rows = need_totals
         
         running_balance = opening_balance
+        totals_known = True
+        mismatch_count = 0
+        mismatch_indices = []  # rows past max_errors, reported in bulk
+        row_errors = []  # per-row errors, added to the result in one batch
         
-        for idx, transaction in enumerate(transactions):
-            try:
-                debit = self._to_decimal(transaction.get('debit', 0))
-                credit = self._to_decimal(transaction.get('credit', 0))
-                stated_balance = self._to_decimal(transaction.get('balance'))
-                
-                # Calculate expected balance
-                if credit > 0:
-                    expected_balance = running_balance + credit
+        # With numba installed and every amount parsed, the walk runs compiled
+        # and hands back only the mismatching rows
+        if check_balances and _compiled_walk is not None:
+            columns = self._walk_columns(transactions, rows)
+            if columns is not None:
+                debits, credits, stated, has_balance = columns
+                indices, expected_values = _compiled_walk(
+                    opening_balance, debits, credits, stated, has_balance, self.tolerance_cents
+                )
+                for idx, expected_balance in zip(indices.tolist(), expected_values.tolist()):
+                    mismatch_count += 1
+                    if mismatch_count > self.max_errors:
+                        mismatch_indices.append(idx)
+                        continue
+                    row_errors.append(self._mismatch_error(
+                        transactions[idx], idx, expected_balance,
+                        int(stated[idx]), int(debits[idx]), int(credits[idx])
+                    ))
+                check_balances = False  # the loop below only sums dict rows
+        
+        if rows is None:
+            rows = transactions.to_rows() if check_balances else []
+        
+        for idx, (debit, credit, stated_balance) in enumerate(rows):
+            # Accumulate totals from transactions
+            if sum_rows:
+                if credit is None or debit is None:
+                    totals_known = False
                 else:
-                    expected_balance = running_balance - debit
+                    actual_credits += credit
+                    actual_debits += debit
+            
+            if not check_balances:
+                continue
+            
+            try:
+                # Calculate expected balance - one of credit/debit is normally
+                # zero, so this needs no branch on which side is set
+                expected_balance = running_balance + credit - debit
                 
                 # Check if stated balance matches
                 if stated_balance is not None:
-                    difference = abs(stated_balance - expected_balance)
+                    difference = stated_balance - expected_balance
                     
-                    if difference > self.tolerance:
-                        result.add_error(
-                            error_type=ValidationErrorType.BALANCE_MISMATCH,
-                            message=(
-                                f"Transaction {idx + 1}: Balance mismatch. "
-                                f"Expected: {expected_balance:.2f}, "
-                                f"Stated: {stated_balance:.2f}"
-                            ),
-                            severity=ValidationSeverity.ERROR,
-                            field=f"transactions[{idx}].balance",
-                            expected=float(expected_balance),
-                            actual=float(stated_balance),
-                            context={
-                                "transaction_index": idx,
-                                "transaction_date": transaction.get('date'),
-                                "description": transaction.get('description', '')[:50],
-                                "debit": float(debit),
-                                "credit": float(credit)
-                            }
-                        )
+                    if difference > self.tolerance_cents or -difference > self.tolerance_cents:
+                        mismatch_count += 1
+                        if mismatch_count > self.max_errors:
+                            mismatch_indices.append(idx)
+                            continue
+                        row_errors.append(self._mismatch_error(
+                            transactions[idx], idx,
+                            expected_balance, stated_balance, debit, credit
+                        ))
                     else:
                         # Update running balance with stated balance for next iteration
                         running_balance = stated_balance
@@ -201,71 +399,151 @@ class BalanceValidator:
                     running_balance = expected_balance
             
             except Exception as e:
-                logger.error(f"Error validating transaction {idx}: {e}")
-                result.add_error(
-                    error_type=ValidationErrorType.CALCULATION_ERROR,
+                logger.error("Error validating transaction %d: %s", idx, e)
+                row_errors.append(ValidationError(
+                    error_type=ValidationErrorType.CALCULATION_ERROR.value,
+                    severity=ValidationSeverity.WARNING.value,
                     message=f"Transaction {idx + 1}: Validation failed - {str(e)}",
-                    severity=ValidationSeverity.WARNING,
                     field=f"transactions[{idx}]"
-                )
-    
-    def _validate_totals(
-        self,
-        statement_data: Dict,
-        result: ValidationResult
-    ):
-        """Validate that total credits/debits match sum of transactions"""
-        transactions = statement_data.get('transactions', [])
-        if not transactions:
-            return
+                ))
         
-        stated_credits = self._to_decimal(statement_data.get('total_credits'))
-        stated_debits = self._to_decimal(statement_data.get('total_debits'))
+        result.add_errors(row_errors)
         
-        # Calculate actual totals from transactions
-        actual_credits = sum(
-            self._to_decimal(t.get('credit', 0))
-            for t in transactions
-        )
-        actual_debits = sum(
-            self._to_decimal(t.get('debit', 0))
-            for t in transactions
-        )
+        # Typically a misread column - one error instead of one per row
+        if mismatch_indices:
+            result.add_error(
+                error_type=ValidationErrorType.BALANCE_MISMATCH,
+                message=(
+                    f"{len(mismatch_indices)} more transactions have balance mismatches "
+                    f"(only the first {self.max_errors} are reported individually)"
+                ),
+                severity=ValidationSeverity.ERROR,
+                field="transactions",
+                context={
+                    "affected_row_count": len(mismatch_indices),
+                    "sample_rows": mismatch_indices[:20]
+                }
+            )
+        
+        # Unparseable amounts can't be totalled (the walk reports those rows)
+        if not need_totals or not totals_known:
+            return
         
         # Check credits
         if stated_credits is not None:
-            diff = abs(stated_credits - actual_credits)
-            if diff > self.tolerance:
+            diff = stated_credits - actual_credits
+            if diff > self.tolerance_cents or -diff > self.tolerance_cents:
                 result.add_error(
                     error_type=ValidationErrorType.CALCULATION_ERROR,
                     message=(
                         f"Total credits mismatch. "
-                        f"Stated: {stated_credits:.2f}, "
-                        f"Sum of transactions: {actual_credits:.2f}"
+                        f"Stated: {_fmt(stated_credits)}, "
+                        f"Sum of transactions: {_fmt(actual_credits)}"
                     ),
                     severity=ValidationSeverity.ERROR,
                     field="total_credits",
-                    expected=float(actual_credits),
-                    actual=float(stated_credits)
+                    expected=actual_credits / 100,
+                    actual=stated_credits / 100
                 )
         
         # Check debits
         if stated_debits is not None:
-            diff = abs(stated_debits - actual_debits)
-            if diff > self.tolerance:
+            diff = stated_debits - actual_debits
+            if diff > self.tolerance_cents or -diff > self.tolerance_cents:
                 result.add_error(
                     error_type=ValidationErrorType.CALCULATION_ERROR,
                     message=(
                         f"Total debits mismatch. "
-                        f"Stated: {stated_debits:.2f}, "
-                        f"Sum of transactions: {actual_debits:.2f}"
+                        f"Stated: {_fmt(stated_debits)}, "
+                        f"Sum of transactions: {_fmt(actual_debits)}"
                     ),
                     severity=ValidationSeverity.ERROR,
                     field="total_debits",
-                    expected=float(actual_debits),
-                    actual=float(stated_debits)
+                    expected=actual_debits / 100,
+                    actual=stated_debits / 100
                 )
     
+    def _walk_columns(self, transactions, rows: Optional[List]) -> Optional[tuple]:
+        """(debits, credits, stated, has_balance) arrays for the compiled walk, None if an amount didn't parse"""
+        if isinstance(transactions, TransactionColumns):
+            return (
+                transactions.debit_cents,
+                transactions.credit_cents,
+                transactions.balance_cents,
+                transactions.has_balance
+            )
+        if any(row[0] is None or row[1] is None for row in rows):
+            return None
+        
+        try:
+            return (
+                np.array([row[0] for row in rows], dtype=np.int64),
+                np.array([row[1] for row in rows], dtype=np.int64),
+                np.array([0 if row[2] is None else row[2] for row in rows], dtype=np.int64),
+                np.array([row[2] is not None for row in rows], dtype=bool)
+            )
+        except OverflowError:
+            return None
+    
+    def _mismatch_error(
+        self,
+        transaction: Dict,
+        idx: int,
+        expected_balance: int,
+        stated_balance: int,
+        debit: int,
+        credit: int
+    ) -> ValidationError:
+        """Error for one transaction whose stated balance doesn't match the running balance"""
+        return ValidationError(
+            error_type=ValidationErrorType.BALANCE_MISMATCH.value,
+            severity=ValidationSeverity.ERROR.value,
+            message=(
+                f"Transaction {idx + 1}: Balance mismatch. "
+                f"Expected: {_fmt(expected_balance)}, "
+                f"Stated: {_fmt(stated_balance)}"
+            ),
+            field=f"transactions[{idx}].balance",
+            expected=expected_balance / 100,
+            actual=stated_balance / 100,
+            context={
+                "transaction_index": idx,
+                "transaction_date": transaction.get('date'),
+                "description": transaction.get('description', '')[:50],
+                "debit": debit / 100,
+                "credit": credit / 100
+            }
+        )
+    
+    def _balances_consistent(self, opening_balance: int, rows: List) -> bool:
+        """
+        True if every transaction states a balance that matches the previous
+        balance plus its credit (or minus its debit) - the row-by-row walk
+        would then report nothing. Checked on int64 cents in one NumPy pass:
+        with every row matching, the running balance before row i is simply
+        the stated balance of row i-1.
+        """
+        if any(None in row for row in rows):
+            return False
+        
+        try:
+            columns = np.array(rows, dtype=np.int64)
+        except OverflowError:
+            return False
+        return self._columns_consistent(opening_balance, columns[:, 0], columns[:, 1], columns[:, 2])
+    
+    def _columns_consistent(
+        self,
+        opening_balance: int,
+        debits: np.ndarray,
+        credits: np.ndarray,
+        stated: np.ndarray
+    ) -> bool:
+        """_balances_consistent() on int64 cents columns"""
+        previous = np.concatenate(([opening_balance], stated[:-1]))
+        expected = previous + credits - debits
+        return not np.any(np.abs(stated - expected) > self.tolerance_cents)
+    
     def validate_multi_statement_continuity(
         self,
         statements: List[Dict],
@@ -305,71 +583,67 @@ class BalanceValidator:
                 key=lambda s: s.get('statement_period_to', '1900-01-01')
             )
         
-        # Check each consecutive pair
-        for i in range(len(statements) - 1):
+        # Statement i's closing vs statement i+1's opening, compared for all
+        # pairs at once; pairs with a missing side are skipped
+        closings = [self._to_cents(s.get('closing_balance')) for s in statements[:-1]]
+        openings = [self._to_cents(s.get('opening_balance')) for s in statements[1:]]
+        try:
+            closing_cents = np.array([_MISSING if c is None else c for c in closings], dtype=np.int64)
+            opening_cents = np.array([_MISSING if o is None else o for o in openings], dtype=np.int64)
+        except OverflowError:
+            # Amounts beyond int64 - same math on Python ints
+            closing_cents = np.array([_MISSING if c is None else c for c in closings], dtype=object)
+            opening_cents = np.array([_MISSING if o is None else o for o in openings], dtype=object)
+        
+        known = (closing_cents != _MISSING) & (opening_cents != _MISSING)
+        differences = closing_cents - opening_cents
+        violations = known & ((differences > self.tolerance_cents) | (-differences > self.tolerance_cents))
+        
+        # Check each discontinuous pair
+        for i in np.flatnonzero(violations).tolist():
             current = statements[i]
             next_stmt = statements[i + 1]
             
-            current_closing = self._to_decimal(current.get('closing_balance'))
-            next_opening = self._to_decimal(next_stmt.get('opening_balance'))
-            
-            if current_closing is None or next_opening is None:
-                continue
-            
-            difference = abs(current_closing - next_opening)
-            
-            if difference > self.tolerance:
-                result.add_error(
-                    error_type=ValidationErrorType.CROSS_DOC_INCONSISTENCY,
-                    message=(
-                        f"Balance discontinuity between statements. "
-                        f"Statement {i+1} closing: {current_closing:.2f}, "
-                        f"Statement {i+2} opening: {next_opening:.2f}"
-                    ),
-                    severity=ValidationSeverity.ERROR,
-                    context={
-                        "statement_1_period": f"{current.get('statement_period_from')} to {current.get('statement_period_to')}",
-                        "statement_2_period": f"{next_stmt.get('statement_period_from')} to {next_stmt.get('statement_period_to')}",
-                        "difference": float(difference)
-                    }
-                )
+            result.add_error(
+                error_type=ValidationErrorType.CROSS_DOC_INCONSISTENCY,
+                message=(
+                    f"Balance discontinuity between statements. "
+                    f"Statement {i+1} closing: {_fmt(closings[i])}, "
+                    f"Statement {i+2} opening: {_fmt(openings[i])}"
+                ),
+                severity=ValidationSeverity.ERROR,
+                context={
+                    "statement_1_period": f"{current.get('statement_period_from')} to {current.get('statement_period_to')}",
+                    "statement_2_period": f"{next_stmt.get('statement_period_from')} to {next_stmt.get('statement_period_to')}",
+                    "difference": abs(closings[i] - openings[i]) / 100
+                }
+            )
         
         return result
     
     @staticmethod
-    def _to_decimal(value) -> Optional[Decimal]:
+    def _to_cents(value) -> Optional[int]:
         """
-        Convert value to Decimal for precise calculations
+        Convert value to integer cents (rounded half-up to 2 decimal places)
         
         Args:
             value: Number or string to convert
             
         Returns:
-            Decimal value or None if invalid
+            Amount in cents or None if invalid
         """
         if value is None:
             return None
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value * 100
         
-        try:
-            # Handle string or numeric input
-            if isinstance(value, str):
-                # Remove commas and currency symbols
-                value = value.replace(',', '').replace('₹', '').replace('$', '').strip()
-            
-            decimal_value = Decimal(str(value))
-            # Round to 2 decimal places
-            return decimal_value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        except (ValueError, TypeError):
-            logger.warning(f"Could not convert '{value}' to Decimal")
-            return None
-
+        # Statements repeat the same few strings ("0.00", fees, round
+        # amounts), so string parsing is memoized at module level
+        return _parse_cents(value if isinstance(value, str) else str(value))
 
-# Singleton instance
-_balance_validator = None
 
+# One shared instance per tolerance
+@lru_cache(maxsize=8)
 def get_balance_validator(tolerance: float = 0.01) -> BalanceValidator:
-    """Get or create balance validator instance"""
-    global _balance_validator
-    if _balance_validator is None:
-        _balance_validator = BalanceValidator(tolerance=tolerance)
-    return _balance_validator
+    """Get or create the balance validator for this tolerance"""
+    return BalanceValidator(tolerance=tolerance)
@@ -0,0 +1,50 @@
+"""
+Compiled balance walk for BalanceValidator
+Runs the running-balance walk over int64 cents columns as native code via
+Numba, returning only the rows that mismatch so the validator builds error
+objects for those alone
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _check_balances(opening_cents, debits, credits, stated, has_balance, tol_cents):
+    """
+    Walk the statement like BalanceValidator's row loop: each row's expected
+    balance is the running balance plus credit minus debit; a stated balance
+    within tolerance becomes the new running balance, a mismatching one is
+    recorded and leaves the running balance unchanged.
+
+    Returns:
+        (mismatch_indices, expected_values) int64 arrays
+    """
+    count = debits.shape[0]
+    indices = np.empty(count, dtype=np.int64)
+    expected_values = np.empty(count, dtype=np.int64)
+    found = 0
+    running = opening_cents
+
+    for i in range(count):
+        expected = running + credits[i] - debits[i]
+        if has_balance[i]:
+            diff = stated[i] - expected
+            if diff > tol_cents or -diff > tol_cents:
+                indices[found] = i
+                expected_values[found] = expected
+                found += 1
+            else:
+                running = stated[i]
+        else:
+            running = expected
+
+    return indices[:found], expected_values[:found]
+
+
+# Compiled once per machine and cached on disk next to this module
+check_balances = njit(cache=True)(_check_balances) if NUMBA_AVAILABLE else None
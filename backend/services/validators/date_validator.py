@@ -4,9 +4,14 @@ Validates chronological ordering and date consistency in bank statements
 """
 
 import logging
+import re
+import sys
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-from collections import Counter
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
 
 from .validation_models import (
     ValidationResult,
@@ -18,6 +23,48 @@ from .validation_models import (
 logger = logging.getLogger(__name__)
 
 
+# Fallback formats in the order they're tried: %Y-%m-%d, %d-%m-%Y, %d/%m/%Y,
+# %m/%d/%Y. Field patterns are the ones datetime.strptime uses, so the same
+# strings match - without raising and catching ValueError per failed format
+_Y = r'(?P<y>\d\d\d\d)'
+_M = r'(?P<m>1[0-2]|0[1-9]|[1-9])'
+_D = r'(?P<d>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])'
+_DATE_PATTERNS = [
+    re.compile(f'{_Y}-{_M}-{_D}'),
+    re.compile(f'{_D}-{_M}-{_Y}'),
+    re.compile(f'{_D}/{_M}/{_Y}'),
+    re.compile(f'{_M}/{_D}/{_Y}')
+]
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_str(date_value: str) -> Optional[date]:
+    """Parse a date string - memoized, statements repeat the same few dates"""
+    try:
+        # Try ISO format first; the date is the statement's wall-clock one
+        return datetime.fromisoformat(date_value.replace('Z', '+00:00')).date()
+    except ValueError:
+        # Try other common formats
+        for pattern in _DATE_PATTERNS:
+            match = pattern.fullmatch(date_value)
+            if match is None:
+                continue
+            try:
+                return date(int(match['y']), int(match['m']), int(match['d']))
+            except ValueError:
+                continue  # e.g. 31/02 - day/month may still read as month/day
+    
+    logger.warning(f"Could not parse date: {date_value}")
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _normalize_description(description: str) -> str:
+    """Duplicate-check key for a description - memoized and interned, since
+    statements repeat the same merchants"""
+    return sys.intern(description.strip().lower())
+
+
 class DateSequencingValidator:
     """
     Validates date sequencing and consistency in bank statements
@@ -59,20 +106,18 @@ class DateSequencingValidator:
             }
         )
         
-        # Check 1: Validate statement period dates
-        self._validate_period_dates(statement_data, result)
-        
-        # Check 2: Validate transaction date ordering
-        self._validate_transaction_ordering(statement_data, result)
-        
-        # Check 3: Validate transactions within period
-        self._validate_dates_in_period(statement_data, result)
+        # Parse every date once, shared by all checks
+        period_from = self._parse_date(statement_data.get('statement_period_from'))
+        period_to = self._parse_date(statement_data.get('statement_period_to'))
+        transactions = statement_data.get('transactions', [])
+        dates = [self._parse_date(transaction.get('date')) for transaction in transactions]
         
-        # Check 4: Detect date anomalies
-        self._detect_date_anomalies(statement_data, result)
+        # Check 1: Validate statement period dates
+        self._validate_period_dates(statement_data, period_from, period_to, result)
         
-        # Check 5: Check for large transaction gaps
-        self._check_transaction_gaps(statement_data, result)
+        # Checks 2-5: Transaction date ordering, dates within period, date
+        # anomalies and large transaction gaps, in one pass over the rows
+        self._validate_transactions(transactions, dates, period_from, period_to, result)
         
         logger.info(
             f"[DateSequencingValidator] Validation complete: "
@@ -84,12 +129,11 @@ class DateSequencingValidator:
     def _validate_period_dates(
         self,
         statement_data: Dict,
+        period_from: Optional[date],
+        period_to: Optional[date],
         result: ValidationResult
     ):
         """Validate statement period from/to dates are valid"""
-        period_from = self._parse_date(statement_data.get('statement_period_from'))
-        period_to = self._parse_date(statement_data.get('statement_period_to'))
-        
         if period_from is None or period_to is None:
             result.add_error(
                 error_type=ValidationErrorType.DATE_OUT_OF_RANGE,
@@ -105,8 +149,8 @@ class DateSequencingValidator:
                 error_type=ValidationErrorType.DATE_OUT_OF_ORDER,
                 message=(
                     f"Statement period invalid: "
-                    f"End date ({period_to.date()}) is before or same as "
-                    f"start date ({period_from.date()})"
+                    f"End date ({period_to}) is before or same as "
+                    f"start date ({period_from})"
                 ),
                 severity=ValidationSeverity.ERROR,
                 field="statement_period_to",
@@ -117,11 +161,11 @@ class DateSequencingValidator:
             )
         
         # Check period is not in future
-        today = datetime.now()
+        today = date.today()
         if period_to > today:
             result.add_warning(
                 warning_type="future_date",
-                message=f"Statement period end date ({period_to.date()}) is in the future",
+                message=f"Statement period end date ({period_to}) is in the future",
                 field="statement_period_to",
                 recommendation="Verify this is correct"
             )
@@ -136,21 +180,34 @@ class DateSequencingValidator:
                 recommendation="Verify this is a valid statement"
             )
     
-    def _validate_transaction_ordering(
+    def _validate_transactions(
         self,
-        statement_data: Dict,
+        transactions: List[Dict],
+        dates: List[Optional[date]],
+        period_from: Optional[date],
+        period_to: Optional[date],
         result: ValidationResult
     ):
-        """Validate transactions are in chronological order"""
-        transactions = statement_data.get('transactions', [])
-        
+        """
+        Validate transaction dates in a single pass: chronological order,
+        within the statement period, duplicate date/description pairs and
+        large gaps. Findings are still reported grouped by check.
+        """
         if not transactions:
             return
         
+        # Missing period dates are already flagged in period validation
+        check_period = period_from is not None and period_to is not None
+        # Duplicates and gaps need at least two transactions
+        check_pairs = len(transactions) >= 2
+        
+        date_desc_indices = {}  # (date, description) -> transaction indices
+        valid_indices = []
+        valid_dates = []
         prev_date = None
-        for idx, transaction in enumerate(transactions):
-            current_date = self._parse_date(transaction.get('date'))
-            
+        is_sorted = True  # no ordering errors so far
+        
+        for idx, (transaction, current_date) in enumerate(zip(transactions, dates)):
             if current_date is None:
                 result.add_error(
                     error_type=ValidationErrorType.DATE_OUT_OF_RANGE,
@@ -166,153 +223,115 @@ class DateSequencingValidator:
             
             # Check chronological order
             if prev_date is not None and current_date < prev_date:
+                is_sorted = False
                 result.add_error(
                     error_type=ValidationErrorType.DATE_OUT_OF_ORDER,
                     message=(
                         f"Transaction {idx + 1}: Date out of order. "
-                        f"Current: {current_date.date()}, Previous: {prev_date.date()}"
+                        f"Current: {current_date}, Previous: {prev_date}"
                     ),
                     severity=ValidationSeverity.ERROR,
                     field=f"transactions[{idx}].date",
                     context={
-                        "current_date": current_date.date().isoformat(),
-                        "previous_date": prev_date.date().isoformat(),
+                        "current_date": current_date.isoformat(),
+                        "previous_date": prev_date.isoformat(),
                         "current_description": transaction.get('description', '')[:50]
                     }
                 )
             
             prev_date = current_date
-    
-    def _validate_dates_in_period(
-        self,
-        statement_data: Dict,
-        result: ValidationResult
-    ):
-        """Validate all transaction dates are within statement period"""
-        period_from = self._parse_date(statement_data.get('statement_period_from'))
-        period_to = self._parse_date(statement_data.get('statement_period_to'))
-        
-        if period_from is None or period_to is None:
-            return  # Already flagged in period validation
+            valid_indices.append(idx)
+            valid_dates.append(current_date)
+            
+            if check_pairs:
+                desc = _normalize_description(transaction.get('description', ''))
+                date_desc_indices.setdefault((current_date, desc), []).append(idx)
         
-        transactions = statement_data.get('transactions', [])
+        if not valid_dates:
+            return
         
-        for idx, transaction in enumerate(transactions):
-            trans_date = self._parse_date(transaction.get('date'))
+        # Period and gap checks compare all valid dates at once
+        stamps = np.array(valid_dates, dtype='datetime64[D]')
+        
+        # Check if transaction dates are outside period
+        if check_period:
+            start = np.datetime64(period_from, 'D')
+            end = np.datetime64(period_to, 'D')
+            if is_sorted:
+                # In-order dates: the out-of-period ones are a prefix before
+                # the start and a suffix after the end
+                before = int(np.searchsorted(stamps, start, side='left'))
+                after = max(int(np.searchsorted(stamps, end, side='right')), before)
+                outside = chain(range(before), range(after, len(stamps)))
+            else:
+                outside = np.flatnonzero((stamps < start) | (stamps > end)).tolist()
             
-            if trans_date is None:
-                continue  # Already flagged
-            
-            # Check if transaction date is outside period
-            if trans_date < period_from or trans_date > period_to:
+            for pos in outside:
+                idx = valid_indices[pos]
+                trans_date = valid_dates[pos]
                 result.add_error(
                     error_type=ValidationErrorType.DATE_OUT_OF_RANGE,
                     message=(
-                        f"Transaction {idx + 1}: Date {trans_date.date()} "
+                        f"Transaction {idx + 1}: Date {trans_date} "
                         f"outside statement period "
-                        f"({period_from.date()} to {period_to.date()})"
+                        f"({period_from} to {period_to})"
                     ),
                     severity=ValidationSeverity.ERROR,
                     field=f"transactions[{idx}].date",
                     context={
-                        "transaction_date": trans_date.date().isoformat(),
-                        "period_from": period_from.date().isoformat(),
-                        "period_to": period_to.date().isoformat(),
-                        "description": transaction.get('description', '')[:50]
+                        "transaction_date": trans_date.isoformat(),
+                        "period_from": period_from.isoformat(),
+                        "period_to": period_to.isoformat(),
+                        "description": transactions[idx].get('description', '')[:50]
                     }
                 )
-    
-    def _detect_date_anomalies(
-        self,
-        statement_data: Dict,
-        result: ValidationResult
-    ):
-        """Detect suspicious date patterns"""
-        transactions = statement_data.get('transactions', [])
         
-        if len(transactions) < 2:
-            return
-        
-        # Check for duplicate dates with same description (potential duplicate entry)
-        date_desc_combos = []
-        for idx, transaction in enumerate(transactions):
-            trans_date = self._parse_date(transaction.get('date'))
-            if trans_date:
-                desc = transaction.get('description', '').strip().lower()
-                date_desc_combos.append((trans_date.date(), desc, idx))
-        
-        # Count duplicates
-        combo_counts = Counter([
-            (date, desc) for date, desc, idx in date_desc_combos
-        ])
-        
-        for (date, desc), count in combo_counts.items():
+        # Duplicate dates with same description (potential duplicate entry)
+        for (dup_date, desc), duplicate_indices in date_desc_indices.items():
+            count = len(duplicate_indices)
             if count > 1:
-                # Find indices of duplicates
-                duplicate_indices = [
-                    idx for d, dsc, idx in date_desc_combos
-                    if d == date and dsc == desc
-                ]
-                
                 result.add_warning(
                     warning_type="possible_duplicate",
                     message=(
-                        f"Possible duplicate transactions on {date}: "
+                        f"Possible duplicate transactions on {dup_date}: "
                         f"\"{desc[:40]}\" appears {count} times"
                     ),
                     field="transactions",
                     recommendation="Verify these are not duplicate entries",
                     context={
-                        "date": date.isoformat(),
+                        "date": dup_date.isoformat(),
                         "description": desc[:100],
                         "indices": duplicate_indices,
                         "count": count
                     }
                 )
-    
-    def _check_transaction_gaps(
-        self,
-        statement_data: Dict,
-        result: ValidationResult
-    ):
-        """Check for unusually large gaps between transactions"""
-        transactions = statement_data.get('transactions', [])
         
-        if len(transactions) < 2:
+        if len(stamps) < 2:
             return
         
-        # Parse all transaction dates
-        dates = []
-        for transaction in transactions:
-            trans_date = self._parse_date(transaction.get('date'))
-            if trans_date:
-                dates.append(trans_date)
+        # Check gaps between consecutive transactions in days; dates already
+        # in order need no sort
+        ordered = stamps if is_sorted else np.sort(stamps)
+        gaps = np.diff(ordered).astype(np.int64)
         
-        if len(dates) < 2:
-            return
-        
-        # Sort dates
-        dates.sort()
-        
-        # Check gaps between consecutive transactions
-        for i in range(len(dates) - 1):
-            gap = (dates[i + 1] - dates[i]).days
-            
-            if gap > self.max_gap_days:
-                result.add_warning(
-                    warning_type="large_transaction_gap",
-                    message=(
-                        f"Large gap ({gap} days) between transactions: "
-                        f"{dates[i].date()} to {dates[i + 1].date()}"
-                    ),
-                    field="transactions",
-                    recommendation="Verify no missing transactions in this period",
-                    context={
-                        "gap_days": gap,
-                        "date_from": dates[i].date().isoformat(),
-                        "date_to": dates[i + 1].date().isoformat()
-                    }
-                )
+        for i in np.flatnonzero(gaps > self.max_gap_days).tolist():
+            gap = int(gaps[i])
+            date_from = ordered[i].item()
+            date_to = ordered[i + 1].item()
+            result.add_warning(
+                warning_type="large_transaction_gap",
+                message=(
+                    f"Large gap ({gap} days) between transactions: "
+                    f"{date_from} to {date_to}"
+                ),
+                field="transactions",
+                recommendation="Verify no missing transactions in this period",
+                context={
+                    "gap_days": gap,
+                    "date_from": date_from.isoformat(),
+                    "date_to": date_to.isoformat()
+                }
+            )
     
     def validate_multi_statement_periods(
         self,
@@ -341,21 +360,25 @@ class DateSequencingValidator:
         if len(statements) < 2:
             return result
         
-        # Sort statements by start date if requested
-        if sort_by_date:
-            statements = sorted(
-                statements,
-                key=lambda s: s.get('statement_period_from', '1900-01-01')
+        # Parse each statement's period once
+        periods = [
+            (
+                statement,
+                self._parse_date(statement.get('statement_period_from')),
+                self._parse_date(statement.get('statement_period_to'))
             )
+            for statement in statements
+        ]
+        
+        # Sort statements by start date if requested - on the parsed dates, so
+        # non-ISO formats order correctly; a missing start date sorts first
+        if sort_by_date:
+            periods.sort(key=lambda period: period[1] or date.min)
         
         # Check each consecutive pair
-        for i in range(len(statements) - 1):
-            current = statements[i]
-            next_stmt = statements[i + 1]
-            
-            current_to = self._parse_date(current.get('statement_period_to'))
-            next_from = self._parse_date(next_stmt.get('statement_period_from'))
-            
+        for i, ((current, _, current_to), (next_stmt, next_from, _)) in enumerate(
+            zip(periods, periods[1:])
+        ):
             if current_to is None or next_from is None:
                 continue
             
@@ -366,8 +389,8 @@ class DateSequencingValidator:
                     error_type=ValidationErrorType.CROSS_DOC_INCONSISTENCY,
                     message=(
                         f"Statement periods overlap by {overlap_days} days. "
-                        f"Statement {i+1} ends {current_to.date()}, "
-                        f"Statement {i+2} starts {next_from.date()}"
+                        f"Statement {i+1} ends {current_to}, "
+                        f"Statement {i+2} starts {next_from}"
                     ),
                     severity=ValidationSeverity.ERROR,
                     context={
@@ -384,58 +407,48 @@ class DateSequencingValidator:
                     warning_type="statement_gap",
                     message=(
                         f"Gap of {gap_days} days between statements. "
-                        f"Statement {i+1} ends {current_to.date()}, "
-                        f"Statement {i+2} starts {next_from.date()}"
+                        f"Statement {i+1} ends {current_to}, "
+                        f"Statement {i+2} starts {next_from}"
                     ),
                     recommendation="Consider uploading missing statement",
                     context={
                         "gap_days": gap_days,
-                        "gap_from": current_to.date().isoformat(),
-                        "gap_to": next_from.date().isoformat()
+                        "gap_from": current_to.isoformat(),
+                        "gap_to": next_from.isoformat()
                     }
                 )
         
         return result
     
     @staticmethod
-    def _parse_date(date_value) -> Optional[datetime]:
+    def _parse_date(date_value) -> Optional[date]:
         """
         Parse date from string or date object
         
         Args:
-            date_value: Date string (YYYY-MM-DD) or datetime object
+            date_value: Date string (YYYY-MM-DD), date or datetime object
             
         Returns:
-            datetime object or None if invalid
+            date object or None if invalid
         """
         if date_value is None:
             return None
         
         if isinstance(date_value, datetime):
+            return date_value.date()
+        
+        if isinstance(date_value, date):
             return date_value
         
         if isinstance(date_value, str):
-            try:
-                # Try ISO format first
-                return datetime.fromisoformat(date_value.replace('Z', '+00:00'))
-            except ValueError:
-                # Try other common formats
-                for fmt in ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%m/%d/%Y']:
-                    try:
-                        return datetime.strptime(date_value, fmt)
-                    except ValueError:
-                        continue
+            return _parse_date_str(date_value)
         
         logger.warning(f"Could not parse date: {date_value}")
         return None
 
 
-# Singleton instance
-_date_validator = None
-
+# One shared instance per gap threshold
+@lru_cache(maxsize=8)
 def get_date_validator(max_gap_days: int = 60) -> DateSequencingValidator:
-    """Get or create date validator instance"""
-    global _date_validator
-    if _date_validator is None:
-        _date_validator = DateSequencingValidator(max_gap_days=max_gap_days)
-    return _date_validator
+    """Get or create the date validator for this gap threshold"""
+    return DateSequencingValidator(max_gap_days=max_gap_days)
@@ -3,7 +3,8 @@ Pydantic models for validation results
 Standardized structure for validation errors, warnings, and results
 """
 
-from typing import List, Optional, Dict, Any
+from dataclasses import asdict, dataclass
+from typing import Iterable, List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -27,27 +28,38 @@ class ValidationErrorType(str, Enum):
     CALCULATION_ERROR = "calculation_error"
 
 
-class ValidationError(BaseModel):
+# Errors and warnings are created per flagged transaction, so they're plain
+# slotted dataclasses rather than pydantic models; ValidationResult still
+# serializes them as nested dicts
+
+@dataclass(slots=True)
+class ValidationError:
     """Individual validation error"""
-    error_type: ValidationErrorType
-    severity: ValidationSeverity
+    error_type: str  # ValidationErrorType value
+    severity: str  # ValidationSeverity value
     message: str
     field: Optional[str] = None
     expected: Optional[Any] = None
     actual: Optional[Any] = None
     context: Optional[Dict[str, Any]] = None
     
-    class Config:
-        use_enum_values = True
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict for JSON"""
+        return asdict(self)
 
 
-class ValidationWarning(BaseModel):
+@dataclass(slots=True)
+class ValidationWarning:
     """Individual validation warning"""
     warning_type: str
     message: str
     field: Optional[str] = None
     recommendation: Optional[str] = None
     context: Optional[Dict[str, Any]] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict for JSON"""
+        return asdict(self)
 
 
 class ValidationResult(BaseModel):
@@ -79,6 +91,14 @@ class ValidationResult(BaseModel):
         """Get count of warnings"""
         return len(self.warnings)
     
+    def reset(self, metadata: Optional[Dict[str, Any]] = None):
+        """Clear errors/warnings and return to 'passed' so the object can be reused"""
+        self.status = "passed"
+        self.passed = True
+        self.errors.clear()
+        self.warnings.clear()
+        self.metadata = metadata
+    
     def add_error(
         self,
         error_type: ValidationErrorType,
@@ -88,8 +108,8 @@ class ValidationResult(BaseModel):
     ):
         """Add an error to the result"""
         error = ValidationError(
-            error_type=error_type,
-            severity=severity,
+            error_type=ValidationErrorType(error_type).value,
+            severity=ValidationSeverity(severity).value,
             message=message,
             **kwargs
         )
@@ -98,6 +118,15 @@ class ValidationResult(BaseModel):
         if self.status == "passed":
             self.status = "failed"
     
+    def add_errors(self, errors: Iterable[ValidationError]):
+        """Add already-built errors in one go, updating status once"""
+        count = len(self.errors)
+        self.errors.extend(errors)
+        if len(self.errors) > count:
+            self.passed = False
+            if self.status == "passed":
+                self.status = "failed"
+    
     def add_warning(self, warning_type: str, message: str, **kwargs):
         """Add a warning to the result"""
         warning = ValidationWarning(
@@ -1,9 +1,37 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
 import os
 from datetime import datetime
 
+# orjson serializes responses several times faster than the stdlib; optional
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify() through orjson - same sorted-keys output, encoded in C"""
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+if ORJSON_AVAILABLE:
+    app.json = ORJSONProvider(app)
+logger = logging.getLogger(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # Disable caching for development
@@ -14,6 +42,26 @@ APP_VERSION = "3.1.0"
 # API base URL
 API_URL = os.getenv("API_URL", "http://localhost:8000")
 
+# Per-request /query diagnostics, off unless DEBUG_QUERY=1 - read once here
+# so requests skip building the messages entirely
+DEBUG_QUERY = os.getenv("DEBUG_QUERY", "0") == "1"
+if DEBUG_QUERY:
+    logger.setLevel(logging.INFO)
+    # Own handler, so INFO records show under any server (flask run, gunicorn),
+    # not only when the root logger happens to be configured for INFO
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+
+# Shared session - keeps backend connections alive across requests instead
+# of opening a new one per call
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
 @app.after_request
 def add_header(response):
     """Add headers to prevent caching during development"""
@@ -48,9 +96,14 @@ def upload():
         return jsonify({"error": "Only Excel files (.xlsx, .xls) are supported"}), 400
     
     try:
-        # Send to API
-        files = {'file': (file.filename, file.stream, file.content_type)}
-        response = requests.post(f"{API_URL}/api/statements/upload", files=files)
+        # Send to API - the encoder streams the upload in chunks rather than
+        # building the whole multipart body in memory
+        body = MultipartEncoder(fields={'file': (file.filename, file.stream, file.content_type)})
+        response = SESSION.post(
+            f"{API_URL}/api/statements/upload",
+            data=body,
+            headers={'Content-Type': body.content_type}
+        )
         
         if response.status_code == 200:
             return jsonify(response.json())
@@ -64,7 +117,7 @@ def upload():
 def statements():
     """List all statements"""
     try:
-        response = requests.get(f"{API_URL}/api/statements/")
+        response = SESSION.get(f"{API_URL}/api/statements/")
         return jsonify(response.json())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -109,15 +162,16 @@ def query():
         }), 400
     
     # Log request for debugging
-    print(f"[QUERY] Received: {message[:100]}...")
-    print(f"[QUERY] Account Filter: {data.get('account', 'NONE')}")
-    print(f"[QUERY] Statement ID: {data.get('statement_id', 'NONE')}")
+    if DEBUG_QUERY:
+        logger.info("[QUERY] Received: %s...", message[:100])
+        logger.info("[QUERY] Account Filter: %s", data.get('account', 'NONE'))
+        logger.info("[QUERY] Statement ID: %s", data.get('statement_id', 'NONE'))
     
     try:
         # Set timeout for API request
         timeout_seconds = 30
         
-        response = requests.post(
+        response = SESSION.post(
             f"{API_URL}/api/statements/query",
             json={
                 "message": message,
@@ -132,7 +186,7 @@ def query():
         try:
             result = response.json()
         except ValueError:
-            print(f"[QUERY] Failed to parse JSON response: {response.text[:200]}")
+            logger.error("[QUERY] Failed to parse JSON response: %s", response.text[:200])
             return jsonify({
                 "success": False,
                 "error": {
@@ -143,22 +197,21 @@ def query():
             }), 500
         
         # Log response for debugging
-        if result.get('success'):
-            txn_count = len(result.get('transactions', []))
-            print(f"[QUERY] Response: {txn_count} transactions")
+        if not result.get('success'):
+            error_info = result.get('error', {})
+            logger.warning("[QUERY] Error: %s - %s", error_info.get('code', 'UNKNOWN'), error_info.get('message', 'No message'))
+        elif DEBUG_QUERY:
+            logger.info("[QUERY] Response: %d transactions", len(result.get('transactions', [])))
             if result.get('filters_used'):
-                print(f"[QUERY] Filters Applied: {result.get('filters_used')}")
+                logger.info("[QUERY] Filters Applied: %s", result.get('filters_used'))
             if result.get('metadata', {}).get('fallback_used'):
-                print(f"[QUERY] ⚠️ Fallback mode used")
-        else:
-            error_info = result.get('error', {})
-            print(f"[QUERY] Error: {error_info.get('code', 'UNKNOWN')} - {error_info.get('message', 'No message')}")
+                logger.info("[QUERY] ⚠️ Fallback mode used")
         
         # Pass through status code
         return jsonify(result), response.status_code
         
     except requests.exceptions.Timeout:
-        print(f"[QUERY] Timeout after {timeout_seconds}s")
+        logger.warning("[QUERY] Timeout after %ss", timeout_seconds)
         return jsonify({
             "success": False,
             "error": {
@@ -169,7 +222,7 @@ def query():
         }), 504
         
     except requests.exceptions.ConnectionError as e:
-        print(f"[QUERY] Connection Error: {e}")
+        logger.error("[QUERY] Connection Error: %s", e)
         return jsonify({
             "success": False,
             "error": {
@@ -180,7 +233,7 @@ def query():
         }), 503
         
     except Exception as e:
-        print(f"[QUERY] Error: {e}")
+        logger.exception("[QUERY] Error: %s", e)
         return jsonify({
             "success": False,
             "error": {
@@ -197,7 +250,7 @@ def search():
     params = request.args.to_dict()
     
     try:
-        response = requests.get(f"{API_URL}/api/statements/transactions/search", params=params)
+        response = SESSION.get(f"{API_URL}/api/statements/transactions/search", params=params)
         return jsonify(response.json())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -218,7 +271,7 @@ def analytics():
             params['account'] = account
         
         # Fetch analytics with filters
-        response = requests.get(
+        response = SESSION.get(
             f"{API_URL}/api/statements/analytics/summary",
             params=params
         )
@@ -227,5 +280,6 @@ def analytics():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     app.run(debug=True, port=5000)